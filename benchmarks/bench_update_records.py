@@ -0,0 +1,48 @@
+"""Benchmark DataManager.update_records at increasing dataset sizes.
+
+Usage:
+    poetry run python benchmarks/bench_update_records.py [--sizes 100000 1000000]
+
+For each size a synthetic museum dataset is written to a temporary CSV, one
+region is edited (updates, inserts and deletes) and the in-memory merge plus
+the full update_records call are timed. Time per row should stay roughly
+constant as the dataset grows, i.e. the merge scales linearly.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from crowdsourcing.core.data_manager import DataManager
+
+from synthetic import edit_region, make_dataset
+
+
+def run(sizes):
+    print(f"{'rows':>10} {'merge (s)':>10} {'us/row':>8} {'update_records (s)':>19}")
+    for n_rows in sizes:
+        df = make_dataset(n_rows)
+        region = df['country_name'].iloc[0]
+        edited = edit_region(df, region)
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = DataManager({"DATA_PATH": str(Path(tmp) / "data.csv")})
+            manager.save_data(df)
+
+            start = time.perf_counter()
+            manager._merge_records(df, edited, "id", "country_name", region)
+            merge_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            assert manager.update_records(edited, filter_col="country_name", filter_value=region)
+            total_s = time.perf_counter() - start
+        print(f"{n_rows:>10} {merge_s:>10.3f} {merge_s / n_rows * 1e6:>8.3f} {total_s:>19.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    run(parser.parse_args().sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Benchmark suite for DataManager at several dataset sizes.
+
+Usage:
+    poetry run python benchmarks/suite.py run [--sizes 10000 100000 1000000] [--format csv]
+    poetry run python benchmarks/suite.py compare BASE.json HEAD.json [--threshold 1.2]
+
+``run`` times each operation on a deterministic synthetic dataset and records
+its peak traced memory, then writes the results to
+``benchmarks/results/<commit>.json``. ``compare`` prints the ratio of two
+result files and exits non-zero when any case got slower than ``threshold``.
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from crowdsourcing.core.cache import dataset_cache
+from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.ingest import read_chunks
+from crowdsourcing.core.tokens import TokenRegistry
+
+from synthetic import edit_region, make_dataset, make_tokens
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+TOKEN_LOOKUPS = 10_000
+
+
+class Case:
+    """One timed operation. ``setup`` runs untimed before every repeat."""
+
+    def __init__(self, name: str, run: Callable[[], object], setup: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+
+def measure(case: Case, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        case.setup()
+        gc.collect()
+        start = time.perf_counter()
+        case.run()
+        timings.append(time.perf_counter() - start)
+    # Tracing slows allocations down, so memory gets its own untimed run.
+    case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_mb": peak / 1e6}
+
+
+def build_cases(workdir: Path, n_rows: int, fmt: str) -> List[Case]:
+    df = make_dataset(n_rows)
+    region = df['country_name'].iloc[0]
+    edited = edit_region(df, region)
+    upload = make_dataset(max(n_rows // 100, 1), seed=1).assign(id=None).to_csv(index=False)
+
+    config = {"DATA_PATH": str(workdir / f"data.{fmt}"), "FILTER_COLUMN": "country_name"}
+    manager = DataManager(config)
+    manager.save_data(df)
+
+    token_file = workdir / "tokens.csv"
+    make_tokens(df['country_name'].unique()).to_csv(token_file, index=False)
+    lookups = make_tokens(df['country_name'].unique())['token'].sample(
+        TOKEN_LOOKUPS, replace=True, random_state=0
+    ).tolist()
+
+    def reset():
+        # Restore the original dataset and start from a cold cache.
+        manager.save_data(df)
+        dataset_cache.invalidate()
+
+    def cold():
+        dataset_cache.invalidate()
+
+    def warm():
+        cold()
+        manager.get_region_index("country_name")
+
+    def lookup_tokens():
+        registry = TokenRegistry(token_file)
+        for token in lookups:
+            registry.get(token)
+
+    return [
+        Case("load_data", manager.load_data, cold),
+        Case("get_filtered_data (cold)", lambda: manager.get_filtered_data("country_name", region), cold),
+        Case("get_filtered_data (cached)", lambda: manager.get_filtered_data("country_name", region), warm),
+        Case("update_records", lambda: manager.update_records(edited, filter_col="country_name", filter_value=region), reset),
+        Case("save_data", lambda: manager.save_data(df), cold),
+        Case(f"token lookup x{TOKEN_LOOKUPS}", lookup_tokens),
+        Case("admin append (1%)", lambda: manager.ingest(read_chunks(io.StringIO(upload))), reset),
+    ]
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes: List[int], fmt: str, repeat: int, output: Optional[Path]) -> Path:
+    commit = current_commit()
+    results = []
+    print(f"{'case':<28} {'rows':>10} {'seconds':>10} {'peak MB':>10}")
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            for case in build_cases(Path(tmp), n_rows, fmt):
+                result = {"case": case.name, "rows": n_rows, **measure(case, repeat)}
+                results.append(result)
+                print(f"{case.name:<28} {n_rows:>10} {result['seconds']:>10.4f} {result['peak_mb']:>10.1f}")
+        dataset_cache.invalidate()
+
+    output = output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "format": fmt,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+    return output
+
+
+def compare(base_path: Path, head_path: Path, threshold: float) -> int:
+    base = json.loads(Path(base_path).read_text())
+    head = json.loads(Path(head_path).read_text())
+    baseline = {(r["case"], r["rows"]): r for r in base["results"]}
+    regressions = 0
+    print(f"{base['commit']} -> {head['commit']}")
+    print(f"{'case':<28} {'rows':>10} {'base s':>10} {'head s':>10} {'ratio':>7} {'mem ratio':>10}")
+    for result in head["results"]:
+        before = baseline.get((result["case"], result["rows"]))
+        if before is None:
+            continue
+        ratio = result["seconds"] / max(before["seconds"], 1e-9)
+        mem_ratio = result["peak_mb"] / max(before["peak_mb"], 1e-9)
+        flag = "  <-- slower" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(
+            f"{result['case']:<28} {result['rows']:>10} {before['seconds']:>10.4f} "
+            f"{result['seconds']:>10.4f} {ratio:>7.2f} {mem_ratio:>10.2f}{flag}"
+        )
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the suite and save results as JSON")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--format", default="csv", choices=["csv", "parquet", "feather", "db"])
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", type=Path)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("head", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio that counts as a regression")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args.sizes, args.format, args.repeat, args.output)
+        return 0
+    return compare(args.base, args.head, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Deterministic synthetic datasets shaped like the museum schema."""
+import numpy as np
+import pandas as pd
+
+WORDS = np.array([
+    "national", "city", "art", "history", "science", "railway", "maritime", "folk",
+    "gallery", "heritage", "war", "natural", "textile", "royal", "open-air", "craft",
+])
+
+
+def make_dataset(n_rows: int, n_regions: int = 200, seed: int = 0) -> pd.DataFrame:
+    """Return ``n_rows`` museums spread over ``n_regions`` regions.
+
+    The same arguments always produce the same frame, so timings taken on
+    different commits compare like with like.
+    """
+    rng = np.random.default_rng(seed)
+    regions = np.array([f"Country {i}" for i in range(n_regions)])
+    ids = np.arange(1, n_rows + 1)
+    first = WORDS[rng.integers(0, len(WORDS), n_rows)]
+    second = WORDS[rng.integers(0, len(WORDS), n_rows)]
+    names = pd.Series(first).str.title() + " " + pd.Series(second) + " museum " + pd.Series(ids).astype(str)
+    return pd.DataFrame({
+        'country_name': regions[rng.integers(0, n_regions, n_rows)],
+        'name': names,
+        'heritage': rng.random(n_rows) < 0.1,
+        'description': "A " + pd.Series(first) + " collection with " + pd.Series(rng.integers(1, 500, n_rows)).astype(str) + " objects",
+        'website': "https://museum" + pd.Series(ids).astype(str) + ".example.org",
+        'id': ids,
+    })
+
+
+def make_tokens(regions, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    tokens = [f"{value:08x}" for value in rng.integers(0, 2**32, len(regions))]
+    return pd.DataFrame({'token': ['admin'] + tokens, 'country': ['admin'] + list(regions)})
+
+
+def edit_region(df: pd.DataFrame, region: str) -> pd.DataFrame:
+    edited = df[df['country_name'] == region].copy()
+    edited['description'] = 'Edited description'
+    edited = edited.iloc[: max(len(edited) - 5, 0)]  # delete a few rows
+    added = pd.DataFrame({'name': ['New museum'] * 5, 'heritage': [False] * 5})
+    return pd.concat([edited, added], ignore_index=True)
@@ -2,25 +2,40 @@
 import json
 import streamlit as st
 import pandas as pd
-import io
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from crowdsourcing.core.cache import file_signature
+from crowdsourcing.core.config import CONFIG_PATH
+from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.exports import EXPORT_MIME_TYPES, tokens_to_bytes
+from crowdsourcing.core.ingest import DEFAULT_CHUNK_ROWS, read_chunks
+from crowdsourcing.core.metrics import DEFAULT_METRICS_DIR, metrics
+from crowdsourcing.core.tokens import add_token, provision_tokens, read_token_rows
+from crowdsourcing.ui.export import render_export_controls
 
 def save_config(config: Dict[str, Any], config_path: str = "config.json") -> None:
     """Save configuration to config.json"""
     with open(config_path, "w") as f:
         json.dump(config, f, indent=4)
 
-def handle_dataset_upload(config: Dict[str, Any], current_df: pd.DataFrame) -> None:
+def handle_dataset_upload(config: Dict[str, Any], data_manager: DataManager) -> None:
     """Handle dataset upload and management"""
     st.markdown("### Dataset Management")
+    with st.expander("Current dataset"):
+        st.dataframe(data_manager.preview())
+    with st.expander("Export dataset"):
+        regions = [None] + data_manager.distinct_values(config["FILTER_COLUMN"])
+        render_export_controls(data_manager, regions, key="admin_export")
     uploaded_file = st.file_uploader("Upload new dataset", type=["csv"])
     
     if uploaded_file:
         try:
-            new_data = pd.read_csv(uploaded_file)
+            # Only a few rows are parsed for the preview; the import streams the rest.
+            preview = pd.read_csv(uploaded_file, nrows=5)
+            uploaded_file.seek(0)
             st.write("Preview of uploaded data:")
-            st.dataframe(new_data.head())
+            st.dataframe(preview)
             
             action = st.radio(
                 "Choose action:",
@@ -28,32 +43,57 @@ def handle_dataset_upload(config: Dict[str, Any], current_df: pd.DataFrame) -> N
             )
             
             if st.button("Apply Changes"):
-                if action == "Replace current dataset":
-                    new_data.to_csv(config["DATA_PATH"], index=False)
-                    st.success("Dataset replaced successfully!")
+                mode = "replace" if action == "Replace current dataset" else "append"
+                progress_bar = st.progress(0.0, text="Importing...")
+                total = max(uploaded_file.size, 1)
+
+                def report(result):
+                    progress_bar.progress(
+                        min(uploaded_file.tell() / total, 1.0),
+                        text=f"Imported {result.rows_written:,} of {result.rows_read:,} rows",
+                    )
+
+                result = data_manager.ingest(
+                    read_chunks(uploaded_file, int(config.get("INGEST_CHUNK_ROWS", DEFAULT_CHUNK_ROWS))),
+                    mode=mode,
+                    progress=report,
+                )
+                progress_bar.empty()
+                if result:
+                    verb = "replaced" if mode == "replace" else "appended"
+                    st.success(f"Dataset {verb} successfully! {result.rows_written:,} rows written.")
+                    if result.duplicates:
+                        st.info(f"Skipped {result.duplicates:,} rows with duplicate ids.")
+                    if result.dropped_columns:
+                        st.info(f"Ignored unknown columns: {', '.join(result.dropped_columns)}")
                 else:
-                    updated_data = pd.concat([current_df, new_data], ignore_index=True)
-                    updated_data.to_csv(config["DATA_PATH"], index=False)
-                    st.success("Data appended successfully!")
+                    st.error(f"Error importing data: {result.error}")
                     
         except Exception as e:
             st.error(f"Error processing uploaded file: {str(e)}")
 
-def handle_token_management(config: Dict[str, Any]) -> None:
+@st.cache_data(max_entries=4, show_spinner=False)
+def _read_tokens(token_file: str, signature: Optional[Tuple[int, ...]]) -> pd.DataFrame:
+    # ``signature`` is only part of the cache key: a changed file is re-read.
+    return pd.read_csv(token_file)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _tokens_workbook(token_file: str, signature: Optional[Tuple[int, ...]]) -> bytes:
+    return tokens_to_bytes(read_token_rows(Path(token_file)), "xlsx")
+
+def handle_token_management(config: Dict[str, Any], data_manager: DataManager) -> None:
     """Handle token viewing and management"""
     st.markdown("### Token Management")
     try:
-        tokens_df = pd.read_csv(config["TOKEN_FILE"])
+        token_file = config["TOKEN_FILE"]
+        signature = file_signature(Path(token_file))
+        tokens_df = _read_tokens(token_file, signature)
         st.dataframe(tokens_df)
         
-        # Convert to Excel for download
-        buffer = io.BytesIO()
-        tokens_df.to_excel(buffer, engine='xlsxwriter', index=False)
-        buffer.seek(0)
-        
+        # Excel export is built once per version of the token file
         st.download_button(
             label="Download Tokens as Excel",
-            data=buffer,
+            data=_tokens_workbook(token_file, signature),
             file_name="tokens.xlsx",
             mime="application/vnd.ms-excel"
         )
@@ -63,16 +103,40 @@ def handle_token_management(config: Dict[str, Any]) -> None:
         with st.form("new_token"):
             new_country = st.text_input("Country/Region:")
             if st.form_submit_button("Generate Token"):
-                import uuid
-                new_token = str(uuid.uuid4())[:8]
-                new_row = pd.DataFrame({
-                    'token': [new_token],
-                    'country': [new_country]
-                })
-                updated_tokens = pd.concat([tokens_df, new_row], ignore_index=True)
-                updated_tokens.to_csv(config["TOKEN_FILE"], index=False)
-                st.success(f"New token generated: {new_token}")
+                new_token = add_token(Path(token_file), new_country)
+                st.session_state.token_notice = f"New token generated: {new_token}"
                 st.rerun()
+        if "token_notice" in st.session_state:
+            st.success(st.session_state.pop("token_notice"))
+
+        # Bulk provisioning for every region of the dataset
+        st.markdown("### Tokens for All Regions")
+        st.caption(f"Creates a token for every distinct {config['FILTER_COLUMN']} value that has none.")
+        if st.button("Create Missing Tokens"):
+            regions = data_manager.distinct_values(config["FILTER_COLUMN"])
+            st.session_state.provisioned_tokens = provision_tokens(Path(token_file), regions)
+            st.rerun()
+        provisioned = st.session_state.get("provisioned_tokens")
+        if provisioned is not None:
+            if not provisioned:
+                st.info("Every region already has a token.")
+            else:
+                st.success(f"Created {len(provisioned):,} new tokens.")
+                csv_col, xlsx_col = st.columns(2)
+                with csv_col:
+                    st.download_button(
+                        "Download New Tokens (CSV)",
+                        data=tokens_to_bytes(provisioned, "csv"),
+                        file_name="new_tokens.csv",
+                        mime=EXPORT_MIME_TYPES["csv"],
+                    )
+                with xlsx_col:
+                    st.download_button(
+                        "Download New Tokens (Excel)",
+                        data=tokens_to_bytes(provisioned, "xlsx"),
+                        file_name="new_tokens.xlsx",
+                        mime=EXPORT_MIME_TYPES["xlsx"],
+                    )
                 
     except Exception as e:
         st.error(f"Error managing tokens: {str(e)}")
@@ -91,25 +155,52 @@ def handle_configuration(config: Dict[str, Any]) -> None:
         }
         
         if st.form_submit_button("Save Configuration"):
-            save_config(new_config)
+            # Keep settings that have no field here (storage, journal, metrics...).
+            save_config({**config, **new_config}, str(CONFIG_PATH))
             st.success("Configuration updated! Please refresh the page to see changes.")
 
-def render_admin_page(config: Dict[str, Any], df: pd.DataFrame) -> None:
-    """Main admin interface renderer"""
+def handle_performance(config: Dict[str, Any]) -> None:
+    """Show timing percentiles per rerun phase and DataManager call"""
+    st.markdown("### Performance")
+    summary = metrics.summary()
+    if summary.empty:
+        st.info("No timings recorded yet.")
+        return
+    st.caption(
+        "Latencies of the last reruns in this server process, slowest first. "
+        "Set \"METRICS\": true in the configuration to also export them to "
+        f"{config.get('METRICS_DIR', DEFAULT_METRICS_DIR)}/metrics.jsonl and metrics.prom."
+    )
+    st.dataframe(
+        summary,
+        hide_index=True,
+        column_config={
+            "phase": st.column_config.TextColumn("Phase"),
+            "count": st.column_config.NumberColumn("Calls"),
+            "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+            "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+            "max_ms": st.column_config.NumberColumn("Max (ms)", format="%.1f"),
+        },
+    )
+    if st.button("Reset timings"):
+        metrics.reset()
+        st.rerun()
+
+def render_admin_page(config: Dict[str, Any], data_manager: DataManager) -> None:
+    """Main admin interface renderer.
+
+    Only the selected section runs, so opening the token or configuration
+    pages never loads the dataset.
+    """
     st.subheader("Admin Dashboard")
     
-    # Create tabs for better organization
-    dataset_tab, tokens_tab, config_tab = st.tabs([
-        "Dataset Management", 
-        "Token Management",
-        "Configuration"
-    ])
-    
-    with dataset_tab:
-        handle_dataset_upload(config, df)
-        
-    with tokens_tab:
-        handle_token_management(config)
-        
-    with config_tab:
-        handle_configuration(config)
\ No newline at end of file
+    sections: Dict[str, Callable[[], None]] = {
+        "Dataset Management": lambda: handle_dataset_upload(config, data_manager),
+        "Token Management": lambda: handle_token_management(config, data_manager),
+        "Configuration": lambda: handle_configuration(config),
+        "Performance": lambda: handle_performance(config),
+    }
+    section = st.radio(
+        "Section", list(sections), horizontal=True, key="admin_section", label_visibility="collapsed"
+    )
+    sections[section]()
@@ -1,18 +1,45 @@
 """CLI entry point for the crowdsourcing application."""
+import argparse
 import os
 import sys
 import subprocess
+import time
 from pathlib import Path
 
-def main():
-    """Main CLI entry point."""
+def warm_caches() -> int:
+    """Load the dataset, region index and token store into this process's caches."""
+    from crowdsourcing.core.config import load_config
+    from crowdsourcing.core.data_manager import DataManager
+    from crowdsourcing.core.tokens import get_token_registry
+
+    start = time.perf_counter()
+    config = load_config()
+    data_manager = DataManager(config)
+    rows = len(data_manager.get_region_index(config.get("FILTER_COLUMN", "country_name")))
+    tokens = len(get_token_registry(config["TOKEN_FILE"]))
+    print(f"Warmed caches: {rows} records, {tokens} tokens in {time.perf_counter() - start:.2f}s")
+    return rows
+
+def run_app(warm: bool = False) -> int:
+    """Run the Streamlit application."""
     # Get the path to the main.py file
     main_path = Path(__file__).parent / "main.py"
-    
+
     if not main_path.exists():
         print(f"Error: Could not find main application at {main_path}")
         return 1
-    
+
+    if warm:
+        # The caches live in this process, so the server must run in it too.
+        try:
+            warm_caches()
+            from streamlit.web import cli as streamlit_cli
+            streamlit_cli.main(["run", str(main_path)], standalone_mode=False)
+        except Exception as e:
+            print(f"Error running application: {str(e)}")
+            return 1
+        return 0
+
     # Run streamlit with the main.py file
     cmd = ["streamlit", "run", str(main_path)]
     try:
@@ -20,8 +47,122 @@ def main():
     except Exception as e:
         print(f"Error running application: {str(e)}")
         return 1
-    
+
+    return 0
+
+def migrate(source: str, destination: str) -> int:
+    """Convert a dataset file to another storage format (e.g. CSV to Parquet)."""
+    from crowdsourcing.core.storage import migrate_dataset
+
+    try:
+        rows = migrate_dataset(Path(source), Path(destination))
+    except Exception as e:
+        print(f"Error migrating dataset: {str(e)}")
+        return 1
+    print(f"Migrated {rows} rows from {source} to {destination}")
+    print(f'Set "DATA_PATH" to "{destination}" in config.json to use it.')
+    return 0
+
+def compact() -> int:
+    """Fold the edit journal into a new dataset snapshot."""
+    from crowdsourcing.core.config import load_config
+    from crowdsourcing.core.data_manager import DataManager
+
+    config = load_config()
+    try:
+        compacted = DataManager(config).compact()
+    except Exception as e:
+        print(f"Error compacting journal: {str(e)}")
+        return 1
+    print("Journal compacted." if compacted else "Nothing to compact.")
+    return 0
+
+def provision_tokens(output: str = None) -> int:
+    """Create a token for every region of the dataset that has none."""
+    from crowdsourcing.core.config import load_config
+    from crowdsourcing.core.data_manager import DataManager
+    from crowdsourcing.core.exports import tokens_to_bytes
+    from crowdsourcing.core.tokens import provision_tokens as provision
+
+    config = load_config()
+    try:
+        start = time.perf_counter()
+        regions = DataManager(config).distinct_values(config.get("FILTER_COLUMN", "country_name"))
+        new_rows = provision(config["TOKEN_FILE"], regions)
+        if output and new_rows:
+            fmt = "xlsx" if output.lower().endswith(".xlsx") else "csv"
+            Path(output).write_bytes(tokens_to_bytes(new_rows, fmt))
+    except Exception as e:
+        print(f"Error provisioning tokens: {str(e)}")
+        return 1
+    print(f"Created {len(new_rows)} tokens for {len(regions)} regions in {time.perf_counter() - start:.2f}s")
+    if output and new_rows:
+        print(f"New tokens written to {output}")
+    return 0
+
+def export(fmt: str, region: str = None, output: str = None) -> int:
+    """Write the dataset, or one region of it, to a CSV/Parquet/XLSX file."""
+    import shutil
+    from crowdsourcing.core.config import load_config
+    from crowdsourcing.core.data_manager import DataManager
+    from crowdsourcing.core.exports import DatasetExporter
+
+    config = load_config()
+    try:
+        exporter = DatasetExporter(DataManager(config))
+        path = exporter.export(fmt, region)
+        if output:
+            shutil.copyfile(path, output)
+            path = Path(output)
+    except Exception as e:
+        print(f"Error exporting data: {str(e)}")
+        return 1
+    print(f"Exported to {path}")
     return 0
 
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Streamlit crowdsourcing platform")
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser.add_argument("--warm", action="store_true", help="Pre-load the dataset and tokens before serving")
+
+    run_parser = subparsers.add_parser("run", help="Start the application (default)")
+    run_parser.add_argument(
+        "--warm", action="store_true", default=argparse.SUPPRESS,
+        help="Pre-load the dataset, region index and tokens before the first session connects"
+    )
+
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Convert the dataset to another format, e.g. data.csv -> data.parquet"
+    )
+    migrate_parser.add_argument("source", help="Existing dataset file")
+    migrate_parser.add_argument("destination", help="Target file; format is picked from the extension")
+
+    subparsers.add_parser("compact", help="Fold the edit journal into the dataset file")
+
+    export_parser = subparsers.add_parser("export", help="Export the dataset or one region")
+    export_parser.add_argument("--format", default="csv", choices=["csv", "parquet", "xlsx"])
+    export_parser.add_argument("--region", help="Only export this region")
+    export_parser.add_argument("--output", help="Copy the export to this path")
+
+    provision_parser = subparsers.add_parser(
+        "provision-tokens", help="Create tokens for every region in the dataset that has none"
+    )
+    provision_parser.add_argument("--output", help="Also write the new tokens to this .csv or .xlsx file")
+    return parser
+
+def main(argv=None):
+    """Main CLI entry point."""
+    args = build_parser().parse_args(argv)
+    if args.command == "migrate":
+        return migrate(args.source, args.destination)
+    if args.command == "compact":
+        return compact()
+    if args.command == "export":
+        return export(args.format, args.region, args.output)
+    if args.command == "provision-tokens":
+        return provision_tokens(args.output)
+    return run_app(warm=args.warm)
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
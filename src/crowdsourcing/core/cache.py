@@ -0,0 +1,113 @@
+"""Process-wide in-memory dataset cache."""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+Signature = Tuple[int, ...]
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    """Return the (mtime_ns, size, inode) triple identifying the file's current version."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class CacheEntry:
+    def __init__(self, frame: pd.DataFrame, signature: Signature):
+        self.frame = frame
+        self.signature = signature
+        self.nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        # Derived artifacts (indexes, summaries) that share the entry's lifetime.
+        self.extras: Dict[str, Any] = {}
+
+
+class DatasetCache:
+    """LRU cache of parsed datasets keyed on file path.
+
+    Entries are only served while the file's mtime and size still match the
+    signature recorded when they were stored, so edits made outside the app
+    are picked up on the next read. Entries are evicted least-recently-used
+    first once their combined size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.nbytes for entry in self._entries.values())
+
+    def get_entry(self, path: Path, signature: Optional[Signature] = None) -> Optional[CacheEntry]:
+        key = self.key(path)
+        if signature is None:
+            signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.signature != signature:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def peek(self, path: Path) -> Optional[CacheEntry]:
+        """Return the entry for ``path`` without validating or touching it."""
+        with self._lock:
+            return self._entries.get(self.key(path))
+
+    def get(self, path: Path, signature: Optional[Signature] = None) -> Optional[pd.DataFrame]:
+        entry = self.get_entry(path, signature)
+        return entry.frame if entry is not None else None
+
+    def put(self, path: Path, frame: pd.DataFrame, signature: Optional[Signature] = None) -> Optional[CacheEntry]:
+        if signature is None:
+            signature = file_signature(path)
+        if signature is None:
+            return None
+        entry = CacheEntry(frame, signature)
+        key = self.key(path)
+        with self._lock:
+            self._entries.pop(key, None)
+            if entry.nbytes > self.max_bytes:
+                return None
+            self._entries[key] = entry
+            self._evict()
+        return entry
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.key(path), None)
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(entry.nbytes for entry in self._entries.values())
+        while self._entries and total > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted.nbytes
+
+
+dataset_cache = DatasetCache()
@@ -1,15 +1,34 @@
 """Configuration management module."""
+import copy
 import json
+import threading
 import streamlit as st
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+from crowdsourcing.core.cache import Signature, file_signature
+from crowdsourcing.core.schema import DEFAULT_SCHEMA
+
+CONFIG_PATH = Path("data") / "config.json"
+
+# Parsed config per absolute path, with the file signature it was read at.
+_config_cache: Dict[str, Tuple[Signature, Dict[str, Any]]] = {}
+_config_lock = threading.Lock()
 
 def load_config() -> Dict[str, Any]:
-    """Load configuration from config.json"""
-    data_dir = Path("data")
-    data_dir.mkdir(exist_ok=True)
-    config_path = data_dir / "config.json"
-    
+    """Load configuration from config.json
+
+    The file is parsed once and re-read only when its mtime, size or inode
+    change, so reruns don't touch the disk beyond a stat call.
+    """
+    config_path = CONFIG_PATH
+    key = str(config_path.absolute())
+    signature = file_signature(config_path)
+    cached = _config_cache.get(key)
+    if signature is not None and cached is not None and cached[0] == signature:
+        return copy.deepcopy(cached[1])
+
+    data_dir = config_path.parent
     default_config = {
         "DATA_PATH": str(data_dir / "museums.csv"),
         "TOKEN_FILE": str(data_dir / "tokens.csv"),
@@ -23,23 +42,28 @@ def load_config() -> Dict[str, Any]:
         
         For support, please contact the administrator.
         """,
-        "FILTER_COLUMN": "country_name"
+        "FILTER_COLUMN": "country_name",
+        "SCHEMA": copy.deepcopy(DEFAULT_SCHEMA)
     }
     
-    if not config_path.exists():
+    if signature is None:
         # Save default configuration
+        data_dir.mkdir(exist_ok=True)
         with open(config_path, "w") as f:
             json.dump(default_config, f, indent=4)
         return default_config
     
     try:
         with open(config_path, "r") as f:
-            return json.load(f)
+            config = json.load(f)
+        with _config_lock:
+            _config_cache[key] = (signature, config)
+        return copy.deepcopy(config)
     except Exception as e:
         st.error(f"Error loading configuration: {str(e)}")
         return default_config
 
-def save_config(config: Dict[str, Any], config_path: str = "data/config.json") -> None:
+def save_config(config: Dict[str, Any], config_path: str = str(CONFIG_PATH)) -> None:
     """Save configuration to config.json"""
     try:
         Path(config_path).parent.mkdir(parents=True, exist_ok=True)
@@ -1,11 +1,90 @@
+import hashlib
+import threading
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from crowdsourcing.core.cache import CacheEntry, Signature, dataset_cache
+from crowdsourcing.core.ingest import IdIndex, IngestResult, SchemaCoercer, assign_ids
+from crowdsourcing.core.journal import EditJournal
+from crowdsourcing.core.locking import DatasetLock
+from crowdsourcing.core.metrics import timed
+from crowdsourcing.core.notify import get_file_watcher
+from crowdsourcing.core.region_index import RegionIndex
+from crowdsourcing.core.schema import Schema, concat_like, infer_booleans
+from crowdsourcing.core.storage import get_storage
+
+_compaction_lock = threading.Lock()
+
+DEFAULT_JOURNAL_COMPACT_BYTES = 64 * 1024 * 1024
+
+# Per-row version stamp, bumped whenever a save changes the row.
+VERSION_COLUMN = "_version"
+
+class UpdateResult:
+    """Outcome of a save; truthy when the save went through.
+
+    ``conflicts`` lists the ids of rows that another session changed since
+    they were read. Those rows are left untouched; every other change in the
+    batch is applied.
+    """
+
+    def __init__(self, ok: bool, conflicts: Optional[list] = None, error: Optional[str] = None):
+        self.ok = ok
+        self.conflicts = conflicts or []
+        self.error = error
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        return f"UpdateResult(ok={self.ok}, conflicts={self.conflicts})"
+
+class MergeResult:
+    def __init__(self, frame: pd.DataFrame, kept: np.ndarray, changed: np.ndarray, conflicts: list):
+        self.frame = frame
+        # Old positions of the surviving rows, in order, and new positions of
+        # the rows that were edited in place.
+        self.kept = kept
+        self.changed = changed
+        self.conflicts = conflicts
 
 class DataManager:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.data_path = Path(config["DATA_PATH"])
+        self.schema = Schema.from_config(config)
+        self.storage = get_storage(
+            self.data_path,
+            config.get("STORAGE_BACKEND"),
+            filter_column=config.get("FILTER_COLUMN", "country_name"),
+            dtypes=self.schema.read_dtypes() if self.schema is not None else None,
+        )
+        self.journal = EditJournal(self.data_path) if config.get("JOURNAL") else None
+        self.lock = DatasetLock(self.data_path)
+        self.cache = dataset_cache
+        if "CACHE_MAX_MB" in config:
+            self.cache.resize(int(config["CACHE_MAX_MB"]) * 1024 * 1024)
+        self._watch()
+
+    def _watch(self) -> None:
+        # Other processes serving the same dataset bump the lock generation on
+        # every write, so their saves reach this process's cache right away
+        # instead of on the next stat. Only the first manager per path subscribes.
+        watcher = get_file_watcher(self.config.get("FILE_WATCH", "auto"))
+        paths = [self.data_path, self.lock.path, Path(f"{self.data_path}-wal")]
+        if self.journal is not None:
+            paths += [self.journal.path, self.journal.compacting_path]
+        for path in paths:
+            watcher.subscribe(path, self._drop_stale_cache, key=f"dataset:{self.cache.key(self.data_path)}:{path}")
+
+    def _drop_stale_cache(self) -> None:
+        entry = self.cache.peek(self.data_path)
+        if entry is None:
+            return
+        if entry.signature != self._signature() or entry.extras.get("generation") != self.lock.peek_generation():
+            self.cache.invalidate(self.data_path)
 
     def create_sample_data(self) -> pd.DataFrame:
         df = pd.DataFrame({
@@ -16,10 +95,35 @@ class DataManager:
             'website': ['http://example.com'],
             'id': [1]
         })
+        self._normalize_types(df)
         return df
 
+    def _normalize_types(self, df: pd.DataFrame, compact: bool = True) -> None:
+        # Declared dtypes when the config has a schema; otherwise only text
+        # booleans are recognised and every other column keeps its inferred dtype.
+        if self.schema is not None:
+            self.schema.apply(df, compact=compact)
+        else:
+            infer_booleans(df)
+
+    def _add_versions(self, df: pd.DataFrame) -> None:
+        if len(df.columns) and VERSION_COLUMN not in df.columns:
+            df[VERSION_COLUMN] = 0
+        elif VERSION_COLUMN in df.columns:
+            df[VERSION_COLUMN] = df[VERSION_COLUMN].fillna(0).astype("int64")
+
+    @timed("data_manager.load_data")
     def load_data(self, create_if_missing: bool = False) -> pd.DataFrame:
+        df = self._load_frame(create_if_missing)
+        return df.copy()
+
+    def _load_frame(self, create_if_missing: bool = False) -> pd.DataFrame:
+        # Returns the shared cached frame; callers must not mutate it.
         try:
+            entry = self._cache_entry()
+            if entry is not None:
+                return entry.frame
+
             if not self.data_path.exists():
                 if create_if_missing:
                     df = self.create_sample_data()
@@ -27,46 +131,642 @@ class DataManager:
                     return df
                 return pd.DataFrame()
 
-            df = pd.read_csv(self.data_path)
-            if 'heritage' in df.columns:
-                df['heritage'] = df['heritage'].map({'True': True, 'False': False, True: True, False: False})
+            generation = self.lock.peek_generation()
+            signature = self._signature()
+            df = self.storage.read()
+            self._normalize_types(df)
+            if self.journal is not None and self.journal.exists():
+                df = self._replay_journal(df)
+            self._add_versions(df)
+            entry = self.cache.put(self.data_path, df, signature)
+            if entry is not None:
+                entry.extras["generation"] = generation
             return df
         except Exception as e:
             print(f"Error loading data: {str(e)}")
             return pd.DataFrame()
 
+    @timed("data_manager.save_data")
     def save_data(self, df: pd.DataFrame) -> bool:
         try:
             self.data_path.parent.mkdir(parents=True, exist_ok=True)
-            df_to_save = df.copy()
-            if 'heritage' in df_to_save.columns:
-                df_to_save['heritage'] = df_to_save['heritage'].astype(str)
-            df_to_save.to_csv(self.data_path, index=False)
+            with self.lock:
+                self._write_snapshot(df.copy())
             return True
         except Exception as e:
             print(f"Error saving data: {str(e)}")
             return False
 
+    def _write_snapshot(self, df: pd.DataFrame) -> None:
+        # Caller holds self.lock. Readers only ever see the old or the new file.
+        self.storage.write_atomic(df)
+        if self.journal is not None:
+            # A full save is a new snapshot; earlier journal entries are folded in.
+            self.journal.clear()
+        self._cache_under_lock(df)
+
+    def _cache_under_lock(self, df: pd.DataFrame) -> None:
+        generation = self.lock.bump()
+        self._add_versions(df)
+        entry = self.cache.put(self.data_path, df, self._signature())
+        if entry is not None:
+            entry.extras["generation"] = generation
+
+    def _load_under_lock(self) -> pd.DataFrame:
+        # Timestamps may be too coarse to reveal a rewrite by another process,
+        # so trust the cached frame only if no writer ran since it was loaded.
+        entry = self._cache_entry()
+        if entry is not None and entry.extras.get("generation") != self.lock.generation():
+            self.cache.invalidate(self.data_path)
+        return self._load_frame(create_if_missing=True)
+
+    @timed("data_manager.preview")
+    def preview(self, rows: int = 5) -> pd.DataFrame:
+        """Return the first ``rows`` records without loading the whole dataset."""
+        entry = self._cache_entry()
+        if entry is not None:
+            return entry.frame.head(rows).copy()
+        if not self.data_path.exists() or (self.journal is not None and self.journal.exists()):
+            return self._load_frame().head(rows).copy()
+        try:
+            df = next(iter(self.storage.iter_chunks(rows)), pd.DataFrame()).head(rows)
+        except Exception as e:
+            print(f"Error loading data: {str(e)}")
+            return pd.DataFrame()
+        self._normalize_types(df)
+        return df
+
+    def version(self) -> str:
+        """Short digest identifying the current dataset contents, for derived caches."""
+        state = (self._signature(), self.lock.peek_generation())
+        return hashlib.blake2b(repr(state).encode("utf-8"), digest_size=8).hexdigest()
+
+    def iter_records(
+        self, chunksize: int, filter_col: Optional[str] = None, filter_value: Optional[str] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Yield the dataset (or one region of it) ``chunksize`` rows at a time.
+
+        Without a cached copy or pending journal entries the file is streamed,
+        so memory stays bounded by the chunk size.
+        """
+        if filter_col is not None and filter_value is not None:
+            df = self.get_filtered_data(filter_col, filter_value)
+            chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+        elif (
+            self._cache_entry() is None
+            and self.data_path.exists()
+            and not (self.journal is not None and self.journal.exists())
+        ):
+            chunks = self.storage.iter_chunks(chunksize)
+        else:
+            df = self._load_frame()
+            chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+        for chunk in chunks:
+            chunk = chunk.drop(columns=VERSION_COLUMN, errors="ignore")
+            self._normalize_types(chunk)
+            yield chunk
+
+    @timed("data_manager.distinct_values")
+    def distinct_values(self, column: str) -> list:
+        """Distinct non-empty values of ``column`` in order of first appearance."""
+        entry = self._cache_entry()
+        extras_key = f"distinct:{column}"
+        if entry is not None and extras_key in entry.extras:
+            return list(entry.extras[extras_key])
+        if entry is not None or not self.data_path.exists() or (self.journal is not None and self.journal.exists()):
+            df = self._load_frame()
+            values = df[column] if column in df.columns else pd.Series([], dtype=object)
+        else:
+            # Only the one column is read from the file.
+            values = self.storage.read_columns([column])[column]
+        distinct = [value for value in pd.unique(values.dropna()) if str(value).strip()]
+        entry = self._cache_entry()
+        if entry is not None:
+            entry.extras[extras_key] = distinct
+        return list(distinct)
+
+    @timed("data_manager.get_region_index")
+    def get_region_index(self, filter_col: str) -> RegionIndex:
+        df = self._load_frame(create_if_missing=True)
+        entry = self._cache_entry()
+        extras_key = f"region_index:{filter_col}"
+        if entry is not None and entry.frame is df and extras_key in entry.extras:
+            return entry.extras[extras_key]
+        index = RegionIndex.build(df, filter_col)
+        if entry is not None and entry.frame is df:
+            entry.extras[extras_key] = index
+        return index
+
+    @timed("data_manager.get_filtered_data")
     def get_filtered_data(self, filter_col: str, filter_value: str) -> pd.DataFrame:
-        df = self.load_data(create_if_missing=True)
-        filtered = df[df[filter_col].str.lower() == filter_value.lower()].copy()
-        return filtered
+        if (
+            self.storage.supports_pushdown
+            and self.data_path.exists()
+            and not (self.journal is not None and self.journal.exists())
+            and self._cache_entry() is None
+        ):
+            # Columnar and SQLite backends filter while reading, so only the region's rows
+            # are materialized instead of the whole dataset.
+            df = self.storage.read_filtered(filter_col, filter_value)
+            self._normalize_types(df)
+            self._add_versions(df)
+            return df
+        df = self._load_frame(create_if_missing=True)
+        if filter_col not in df.columns:
+            return df.iloc[0:0].copy()
+        positions = self.get_region_index(filter_col).lookup(filter_value)
+        return df.iloc[positions].copy()
+
+    @timed("data_manager.get_page")
+    def get_page(
+        self,
+        filter_col: str,
+        filter_value: str,
+        offset: int = 0,
+        limit: int = 50,
+        search: Optional[str] = None,
+        search_columns: Optional[list] = None,
+    ) -> Tuple[pd.DataFrame, int]:
+        """Return rows ``offset:offset + limit`` of a region and the region's match count.
+
+        With ``search``, only rows where any of ``search_columns`` (all
+        columns by default) contains the text, case-insensitively, match.
+        """
+        journaled = self.journal is not None and self.journal.exists()
+        if self.storage.supports_row_updates and self.data_path.exists() and not journaled:
+            # SQLite counts and slices the region in the database.
+            df, total = self.storage.read_page(filter_col, filter_value, offset, limit, search, search_columns)
+            self._normalize_types(df)
+            self._add_versions(df)
+            return df, total
+        df = self._load_frame(create_if_missing=True)
+        if filter_col not in df.columns:
+            return df.iloc[0:0].copy(), 0
+        positions = self.get_region_index(filter_col).lookup(filter_value)
+        if search:
+            region = df.iloc[positions]
+            columns = search_columns or [col for col in region.columns if col != VERSION_COLUMN]
+            matches = np.zeros(len(positions), dtype=bool)
+            for col in columns:
+                matches |= region[col].astype(str).str.contains(search, case=False, regex=False, na=False).to_numpy()
+            positions = positions[matches]
+        return df.iloc[positions[offset:offset + limit]].copy(), len(positions)
 
-    def update_records(self, updated_df: pd.DataFrame, id_column: str = "id") -> bool:
+    @timed("data_manager.update_records")
+    def update_records(
+        self,
+        updated_df: pd.DataFrame,
+        id_column: str = "id",
+        filter_col: Optional[str] = None,
+        filter_value: Optional[str] = None,
+        token: Optional[str] = None,
+        original_df: Optional[pd.DataFrame] = None,
+    ) -> UpdateResult:
+        """Save an edited slice of the dataset.
+
+        Rows are matched on ``id_column``. Rows without a known id are
+        inserted; rows of the ``filter_col == filter_value`` scope (or of
+        ``original_df``, the slice as it was read) that are missing from
+        ``updated_df`` are deleted. When the edited rows carry their
+        ``_version`` stamp, rows changed by someone else in the meantime are
+        reported as conflicts instead of being overwritten.
+        """
         try:
-            main_df = self.load_data(create_if_missing=True)
-            
-            if 'heritage' in updated_df.columns:
-                updated_df['heritage'] = updated_df['heritage'].map({'True': True, 'False': False, True: True, False: False})
-            
-            for idx, row in updated_df.iterrows():
-                mask = main_df[id_column] == row[id_column]
-                if mask.any():
-                    for col in updated_df.columns:
-                        if col != id_column:
-                            main_df.loc[mask, col] = row[col]
-            
-            return self.save_data(main_df)
+            self.data_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.lock:
+                if self.storage.supports_row_updates and self.data_path.exists():
+                    return self._update_rows(updated_df, id_column, filter_col, filter_value, original_df)
+                main_df = self._load_under_lock()
+                scope = None
+                if filter_col is not None and filter_value is not None and filter_col in main_df.columns:
+                    scope = self.get_region_index(filter_col).lookup(filter_value)
+                indexes = self._cached_indexes(main_df)
+                result = self._merge_records(
+                    main_df, updated_df, id_column, filter_col, filter_value, scope, original=original_df
+                )
+                merged = result.frame
+                if self.journal is not None and self.data_path.exists():
+                    upserts, deleted_ids = self._diff_records(main_df, merged, id_column)
+                    self.journal.append(upserts, deleted_ids, id_column, token=token, region=filter_value)
+                    self._cache_under_lock(merged)
+                    self._maybe_compact()
+                else:
+                    self._write_snapshot(merged)
+                self._store_indexes({
+                    key: index.update(merged, result.kept, result.changed) for key, index in indexes.items()
+                })
+                return UpdateResult(True, result.conflicts)
         except Exception as e:
             print(f"Error updating records: {str(e)}")
-            return False
\ No newline at end of file
+            return UpdateResult(False, error=str(e))
+
+    @timed("data_manager.apply_changes")
+    def apply_changes(
+        self,
+        changes: Dict[str, Any],
+        id_column: str = "id",
+        filter_col: Optional[str] = None,
+        filter_value: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> UpdateResult:
+        """Save a delta instead of a full edited slice.
+
+        ``changes`` is keyed by id: ``{"edited": {id: {column: value}},
+        "added": [{column: value}], "deleted": [id], "versions": {id: version}}``
+        where ``versions`` holds the ``_version`` each edited or deleted row
+        had when it was read. Only the touched rows are looked up and merged.
+        """
+        edited = changes.get("edited") or {}
+        added = changes.get("added") or []
+        deleted = list(changes.get("deleted") or [])
+        versions = changes.get("versions") or {}
+        if not edited and not added and not deleted:
+            return UpdateResult(True)
+        try:
+            with self.lock:
+                current = self._rows_by_id(list(edited) + deleted, id_column)
+                original = current.copy()
+                if versions and VERSION_COLUMN in original.columns:
+                    read_versions = original[id_column].map(versions)
+                    original[VERSION_COLUMN] = read_versions.fillna(original[VERSION_COLUMN]).astype("int64")
+
+                updated = original[original[id_column].isin(list(edited))].reset_index(drop=True)
+                row_of = {value: pos for pos, value in enumerate(updated[id_column])}
+                for row_id, cells in edited.items():
+                    if row_id not in row_of:
+                        continue
+                    for col, value in cells.items():
+                        if col in (id_column, VERSION_COLUMN) or self._read_only(col):
+                            continue
+                        if col not in updated.columns or updated[col].dtype != object:
+                            updated[col] = updated[col].astype(object) if col in updated.columns else None
+                        updated.at[row_of[row_id], col] = value
+                if added:
+                    updated = pd.concat([updated, pd.DataFrame(added)], ignore_index=True)
+                return self.update_records(
+                    updated, id_column, filter_col, filter_value, token=token, original_df=original
+                )
+        except Exception as e:
+            print(f"Error applying changes: {str(e)}")
+            return UpdateResult(False, error=str(e))
+
+    def _read_only(self, column: str) -> bool:
+        return self.schema is not None and column in self.schema and not self.schema[column].editable
+
+    def _rows_by_id(self, ids: list, id_column: str) -> pd.DataFrame:
+        if self.storage.supports_row_updates and self.data_path.exists():
+            rows = self.storage.read_rows(ids)
+            self._normalize_types(rows)
+            self._add_versions(rows)
+            return rows
+        df = self._load_under_lock()
+        positions = pd.Index(df[id_column]).get_indexer(ids)
+        return df.iloc[positions[positions >= 0]].copy()
+
+    @timed("data_manager.append_records")
+    def append_records(self, new_df: pd.DataFrame) -> bool:
+        if self.journal is not None and self.data_path.exists():
+            return bool(self.update_records(new_df))
+        try:
+            with self.lock:
+                if self.storage.supports_row_updates and self.data_path.exists():
+                    self.storage.apply_changes(new_df, [])
+                    self.lock.bump()
+                    self.cache.invalidate(self.data_path)
+                    return True
+                main_df = self._load_under_lock()
+                indexes = self._cached_indexes(main_df)
+                new_df = new_df.copy()
+                self._normalize_types(new_df, compact=False)
+                merged = concat_like([main_df, new_df])
+                self._write_snapshot(merged)
+                kept = np.arange(len(main_df))
+                self._store_indexes({
+                    key: index.update(merged, kept, np.empty(0, dtype=np.int64)) for key, index in indexes.items()
+                })
+            return True
+        except Exception as e:
+            print(f"Error appending records: {str(e)}")
+            return False
+
+    @timed("data_manager.ingest")
+    def ingest(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        mode: str = "append",
+        id_column: str = "id",
+        progress: Optional[Callable[[IngestResult], None]] = None,
+    ) -> IngestResult:
+        """Stream ``chunks`` into the dataset, replacing it or appending to it.
+
+        Only one chunk is held in memory at a time. Each chunk is coerced to the
+        dataset's columns and dtypes (the first chunk's, when replacing); rows
+        whose id was already taken are skipped and rows without one get the
+        next free id. ``progress`` is called after every chunk.
+        """
+        result = IngestResult()
+        try:
+            self.data_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.lock:
+                appending = mode == "append" and self.data_path.exists()
+                if appending and self.journal is not None and self.journal.exists():
+                    # Fold pending edits in so the file holds every existing record.
+                    self.compact()
+                schema = self._schema_sample() if appending else None
+                taken = IdIndex(self._existing_ids(id_column) if appending else None)
+                state = {"coercer": SchemaCoercer.from_frame(schema) if schema is not None else None}
+                next_id = taken.max() + 1
+
+                def prepared():
+                    nonlocal next_id
+                    for chunk in chunks:
+                        result.rows_read += len(chunk)
+                        if state["coercer"] is None:
+                            self._normalize_types(chunk, compact=False)
+                            if id_column not in chunk.columns:
+                                chunk[id_column] = pd.Series(dtype="float64")
+                            state["coercer"] = SchemaCoercer.from_frame(chunk)
+                        coercer = state["coercer"]
+                        result.dropped_columns += [
+                            column for column in coercer.unknown_columns(chunk) if column not in result.dropped_columns
+                        ]
+                        chunk = coercer.coerce(chunk)
+                        if VERSION_COLUMN in chunk.columns:
+                            chunk[VERSION_COLUMN] = 0
+                        chunk, next_id = assign_ids(chunk, id_column, taken, next_id, result)
+                        result.rows_written += len(chunk)
+                        yield chunk
+                        if progress is not None:
+                            progress(result)
+
+                if appending:
+                    self.storage.append_chunks(prepared())
+                else:
+                    self.storage.write_chunks(prepared())
+                    if self.journal is not None:
+                        self.journal.clear()
+                self.lock.bump()
+                self.cache.invalidate(self.data_path)
+            result.ok = True
+        except Exception as e:
+            result.error = str(e)
+            print(f"Error importing data: {str(e)}")
+        return result
+
+    def _schema_sample(self) -> pd.DataFrame:
+        # Read from the file rather than the cache: cached frames carry
+        # columns (such as the version stamp) the file may not have.
+        sample = next(iter(self.storage.iter_chunks(1000)), pd.DataFrame())
+        # Chunks carry their own category sets, so categories stay plain values here.
+        self._normalize_types(sample, compact=False)
+        return sample.iloc[0:0]
+
+    def _existing_ids(self, id_column: str) -> pd.Series:
+        entry = self._cache_entry()
+        if entry is not None:
+            frame = entry.frame
+            return frame[id_column] if id_column in frame.columns else pd.Series([], dtype=object)
+        try:
+            return self.storage.read_columns([id_column])[id_column]
+        except (KeyError, ValueError):
+            return pd.Series([], dtype=object)
+
+    def _update_rows(
+        self,
+        updated_df: pd.DataFrame,
+        id_column: str,
+        filter_col: Optional[str],
+        filter_value: Optional[str],
+        original_df: Optional[pd.DataFrame],
+    ) -> UpdateResult:
+        # Row-level path: only the edited scope is read, and only rows that
+        # changed are written back, in one transaction.
+        ids = updated_df[id_column].dropna() if id_column in updated_df.columns else pd.Series([], dtype=object)
+        if original_df is not None and id_column in original_df.columns:
+            current = self.storage.read_rows(pd.concat([ids, original_df[id_column]]).dropna().unique())
+        elif filter_col is not None and filter_value is not None:
+            current = self.storage.read_filtered(filter_col, filter_value)
+        else:
+            current = self.storage.read_rows(ids.unique())
+        self._normalize_types(current)
+        self._add_versions(current)
+        max_id = self.storage.max_id()
+        result = self._merge_records(
+            current, updated_df, id_column, filter_col, filter_value,
+            next_id=None if max_id is None else max_id + 1, original=original_df,
+        )
+
+        upserts, deleted_ids = self._diff_records(current, result.frame, id_column)
+        self.storage.apply_changes(upserts, deleted_ids)
+        self.lock.bump()
+        self.cache.invalidate(self.data_path)
+        return UpdateResult(True, result.conflicts)
+
+    def _diff_records(self, current: pd.DataFrame, merged: pd.DataFrame, id_column: str) -> Tuple[pd.DataFrame, pd.Index]:
+        # Rows of merged that are new or differ from current, and ids that disappeared.
+        current_ids = pd.Index(current[id_column])
+        deleted_ids = current_ids.difference(pd.Index(merged[id_column]))
+        known = merged[id_column].isin(current_ids).to_numpy()
+        before = current.set_index(id_column).reindex(merged[id_column][known])
+        after = merged[known].set_index(id_column)[before.columns]
+        same = _same_rows(before, after, list(before.columns))
+        unchanged = known.copy()
+        unchanged[known] = same
+        return merged[~unchanged], deleted_ids
+
+    @timed("data_manager.compact")
+    def compact(self) -> bool:
+        """Fold the edit journal into a new base snapshot, replaced atomically."""
+        if self.journal is None or not self.journal.exists():
+            return False
+        with _compaction_lock, self.lock:
+            self.journal.begin_compaction()
+            df = self.storage.read()
+            self._normalize_types(df)
+            df = self._replay_journal(df, include_active=False)
+            self.storage.write_atomic(df)
+            self.journal.finish_compaction()
+            self.lock.bump()
+            self.cache.invalidate(self.data_path)
+        return True
+
+    def _maybe_compact(self) -> None:
+        limit = int(self.config.get("JOURNAL_COMPACT_BYTES", DEFAULT_JOURNAL_COMPACT_BYTES))
+        if self.journal.size() > limit and not _compaction_lock.locked():
+            threading.Thread(target=self.compact, name="journal-compaction", daemon=True).start()
+
+    def _replay_journal(self, df: pd.DataFrame, id_column: str = "id", include_active: bool = True) -> pd.DataFrame:
+        upserts, deleted_ids = self.journal.replay(id_column, include_active)
+        if not upserts.empty:
+            df = self._merge_records(df, upserts, id_column, None, None, stamp_versions=False).frame
+        if deleted_ids:
+            df = df[~df[id_column].isin(deleted_ids)].reset_index(drop=True)
+        return df
+
+    def _signature(self) -> Optional[Signature]:
+        signature = self.storage.signature()
+        journal = self.journal.signature() if self.journal is not None else None
+        if signature is None or journal is None:
+            return signature
+        return signature + journal
+
+    def _cache_entry(self) -> Optional[CacheEntry]:
+        return self.cache.get_entry(self.data_path, self._signature())
+
+    def _cached_indexes(self, df: pd.DataFrame) -> Dict[str, RegionIndex]:
+        entry = self._cache_entry()
+        if entry is None or entry.frame is not df:
+            return {}
+        return {
+            key: index for key, index in entry.extras.items()
+            if key.startswith("region_index:") and index.column in df.columns
+        }
+
+    def _store_indexes(self, indexes: Dict[str, RegionIndex]) -> None:
+        entry = self._cache_entry()
+        if entry is not None:
+            entry.extras.update(indexes)
+
+    def _merge_records(
+        self,
+        main_df: pd.DataFrame,
+        updated_df: pd.DataFrame,
+        id_column: str,
+        filter_col: Optional[str],
+        filter_value: Optional[str],
+        scope: Optional[np.ndarray] = None,
+        next_id: Optional[int] = None,
+        original: Optional[pd.DataFrame] = None,
+        stamp_versions: bool = True,
+    ) -> MergeResult:
+        # Keyed, vectorized apply: rows are matched on id_column with a single
+        # hash lookup, so the cost is linear in len(main_df) + len(updated_df).
+        updated_df = updated_df.copy()
+        self._normalize_types(updated_df, compact=False)
+
+        main_ids = pd.Index(main_df[id_column])
+        if not main_ids.is_unique:
+            raise ValueError(f"Duplicate values in id column '{id_column}'")
+        incoming_ids = updated_df[id_column] if id_column in updated_df.columns else pd.Series(np.nan, index=updated_df.index)
+        positions = main_ids.get_indexer(incoming_ids)
+        matched = positions >= 0
+        if pd.Index(positions[matched]).has_duplicates:
+            raise ValueError(f"Duplicate values in id column '{id_column}' of the edited data")
+        if VERSION_COLUMN in main_df.columns:
+            current_versions = main_df[VERSION_COLUMN].fillna(0).to_numpy(dtype=np.int64)
+        else:
+            current_versions = np.zeros(len(main_df), dtype=np.int64)
+        conflicts = []
+
+        # Rows of the edited scope that are no longer present were deleted.
+        keep = np.ones(len(main_df), dtype=bool)
+        if original is not None and id_column in original.columns:
+            original_pos = main_ids.get_indexer(original[id_column])
+            present = original_pos >= 0
+            removed = present & ~np.isin(original_pos, positions[matched])
+            if VERSION_COLUMN in original.columns:
+                read_versions = original[VERSION_COLUMN].fillna(0).to_numpy(dtype=np.int64)
+                stale = removed & (read_versions != current_versions[np.where(present, original_pos, 0)])
+                conflicts.extend(original[id_column][stale].tolist())
+                removed &= ~stale
+            keep[original_pos[removed]] = False
+        elif filter_col is not None and filter_value is not None and len(main_df):
+            if scope is None:
+                in_scope = (main_df[filter_col].astype(str).str.lower() == str(filter_value).lower()).to_numpy()
+            else:
+                in_scope = np.zeros(len(main_df), dtype=bool)
+                in_scope[scope] = True
+            in_scope[positions[matched]] = False
+            keep &= ~in_scope
+
+        updated_pos = positions[matched]
+        current_rows = main_df.iloc[updated_pos]
+        updated_rows = current_rows.copy()
+        edited = updated_df[matched]
+        if not stamp_versions and VERSION_COLUMN in edited.columns:
+            # Replaying stored rows: versions are copied, not checked or bumped.
+            updated_rows[VERSION_COLUMN] = edited[VERSION_COLUMN].to_numpy()
+        columns = [col for col in edited.columns if col in updated_rows.columns and col not in (id_column, VERSION_COLUMN)]
+        for col in columns:
+            updated_rows[col] = edited[col].to_numpy()
+        differs = _rows_differ(current_rows, updated_rows, columns)
+
+        if stamp_versions and VERSION_COLUMN in edited.columns:
+            # Compare-and-swap: only rows still at the version they were read
+            # at may be written.
+            stale = edited[VERSION_COLUMN].fillna(0).to_numpy(dtype=np.int64) != current_versions[updated_pos]
+            if stale.any():
+                if original is not None and id_column in original.columns:
+                    read_rows = original.drop_duplicates(id_column).set_index(id_column).reindex(edited[id_column])
+                    shared = [col for col in columns if col in read_rows.columns]
+                    user_changed = _rows_differ(read_rows, edited, shared)
+                else:
+                    user_changed = differs
+                conflicts.extend(edited[id_column][stale & user_changed].tolist())
+                for col in columns:
+                    updated_rows[col] = updated_rows[col].mask(stale, current_rows[col])
+                differs &= ~stale
+        if stamp_versions:
+            updated_rows[VERSION_COLUMN] = current_versions[updated_pos] + differs
+        keep[updated_pos] = False
+
+        base = main_df.iloc[np.flatnonzero(keep)]
+        if VERSION_COLUMN not in base.columns:
+            base = base.assign(**{VERSION_COLUMN: 0})
+        base_pos = np.flatnonzero(keep)
+        combined = concat_like([base, updated_rows])
+        # Restore the original row order with an O(n) scatter instead of a sort.
+        rank = np.full(len(main_df), -1, dtype=np.int64)
+        rank[np.concatenate([base_pos, updated_pos])] = np.arange(len(combined))
+        order = rank[rank >= 0]
+        combined = combined.iloc[order]
+        kept = np.flatnonzero(rank >= 0)
+        changed = np.flatnonzero(order >= len(base_pos))
+
+        inserted = updated_df[~matched]
+        if not inserted.empty:
+            inserted = inserted.reindex(columns=combined.columns)
+            if filter_col is not None and filter_value is not None:
+                inserted[filter_col] = inserted[filter_col].fillna(filter_value)
+            missing_id = inserted[id_column].isna().to_numpy()
+            if missing_id.any():
+                known = pd.concat([main_df[id_column], inserted[id_column]]).dropna()
+                next_id = max(int(known.max()) + 1 if len(known) else 1, next_id or 1)
+                inserted.loc[missing_id, id_column] = np.arange(next_id, next_id + int(missing_id.sum()))
+            inserted[VERSION_COLUMN] = inserted[VERSION_COLUMN].fillna(0) + int(stamp_versions)
+            combined = concat_like([combined, inserted])
+
+        combined = combined.reset_index(drop=True)
+        combined[VERSION_COLUMN] = combined[VERSION_COLUMN].fillna(0).astype("int64")
+        ids = combined[id_column]
+        if ids.dtype == object or pd.api.types.is_float_dtype(ids):
+            numeric = pd.to_numeric(ids, errors="coerce")
+            if numeric.notna().all() and (numeric % 1 == 0).all():
+                combined[id_column] = numeric.astype("int64")
+        self._normalize_types(combined)
+        return MergeResult(combined, kept, changed, conflicts)
+
+def _rows_differ(before: pd.DataFrame, after: pd.DataFrame, columns: list) -> np.ndarray:
+    """Row-wise mask of whether any of ``columns`` differ (NaN equals NaN)."""
+    if not columns:
+        return np.zeros(len(after), dtype=bool)
+    a = before[columns].reset_index(drop=True)
+    b = after[columns].reset_index(drop=True)
+    return ~_same_rows(a, b, columns)
+
+def _same_rows(a: pd.DataFrame, b: pd.DataFrame, columns: list) -> np.ndarray:
+    """Row-wise mask of whether all ``columns`` are equal in two aligned frames."""
+    same = np.ones(len(a), dtype=bool)
+    for col in columns:
+        x, y = a[col], b[col]
+        if isinstance(x.dtype, pd.CategoricalDtype) and isinstance(y.dtype, pd.CategoricalDtype):
+            shorter, longer = sorted((x.cat.categories, y.cat.categories), key=len)
+            if longer[:len(shorter)].equals(shorter):
+                # Categories were only appended to, so equal codes mean equal values.
+                same &= x.cat.codes.to_numpy() == y.cat.codes.to_numpy()
+                continue
+            x, y = x.astype(object), y.astype(object)
+        # Nullable dtypes compare to NA against missing values.
+        equal = (x == y).fillna(False).to_numpy(dtype=bool)
+        same &= equal | (x.isna().to_numpy() & y.isna().to_numpy())
+    return same
@@ -0,0 +1,145 @@
+"""File exports of tokens and dataset records."""
+import hashlib
+import io
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+EXPORT_FORMATS = ("csv", "parquet", "xlsx")
+EXPORT_MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+DEFAULT_EXPORT_CHUNK_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575  # one row is taken by the header
+
+
+def tokens_to_bytes(rows: Iterable[Tuple[str, str]], fmt: str = "csv") -> bytes:
+    """Encode ``(token, region)`` rows as a CSV or XLSX file."""
+    df = pd.DataFrame(list(rows), columns=["token", "country"])
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "xlsx":
+        buffer = io.BytesIO()
+        df.to_excel(buffer, engine="xlsxwriter", index=False)
+        return buffer.getvalue()
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+class DatasetExporter:
+    """Writes dataset exports to files cached by dataset version.
+
+    Records are streamed from the ``DataManager`` in chunks and encoded
+    incrementally, so memory is bounded by the chunk size. An export is named
+    after the dataset version, so asking for the same format and scope again
+    returns the existing file until the dataset changes; older versions of
+    the same export are removed when a new one is written.
+    """
+
+    def __init__(self, data_manager, export_dir: Optional[Path] = None, chunksize: int = DEFAULT_EXPORT_CHUNK_ROWS):
+        self.data_manager = data_manager
+        config = data_manager.config
+        self.export_dir = Path(export_dir or config.get("EXPORT_DIR") or data_manager.data_path.parent / "exports")
+        self.chunksize = chunksize
+        self.filter_col = config.get("FILTER_COLUMN", "country_name")
+
+    def path_for(self, fmt: str, region: Optional[str] = None) -> Path:
+        return self.export_dir / f"{self._prefix(region)}-{self.data_manager.version()}.{fmt}"
+
+    def export(self, fmt: str, region: Optional[str] = None) -> Path:
+        """Return the export file for ``fmt`` and ``region``, writing it if needed."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        path = self.path_for(fmt, region)
+        if path.exists():
+            return path
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        chunks = self.data_manager.iter_records(
+            self.chunksize, self.filter_col if region is not None else None, region
+        )
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            _WRITERS[fmt](chunks, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        for stale in self.export_dir.glob(f"{self._prefix(region)}-*.{fmt}"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        return path
+
+    def file_name(self, fmt: str, region: Optional[str] = None) -> str:
+        stem = self.data_manager.data_path.stem
+        return f"{stem}-{_slug(region)}.{fmt}" if region is not None else f"{stem}.{fmt}"
+
+    def _prefix(self, region: Optional[str]) -> str:
+        stem = self.data_manager.data_path.stem
+        if region is None:
+            return f"{stem}-all"
+        # Slugs can collide ("São Tomé" / "Sao Tome"), so add a short digest of the exact value.
+        digest = hashlib.blake2b(str(region).lower().encode("utf-8"), digest_size=4).hexdigest()
+        return f"{stem}-{_slug(region)}-{digest}"
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-") or "region"
+
+
+def _write_csv(chunks: Iterator[pd.DataFrame], path: Path) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], path: Path) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                table = pa.Table.from_pandas(
+                    chunk.reindex(columns=writer.schema.names), schema=writer.schema, preserve_index=False, safe=False
+                )
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pd.DataFrame().to_parquet(path)
+
+
+def _write_xlsx(chunks: Iterator[pd.DataFrame], path: Path) -> None:
+    import xlsxwriter
+
+    # constant_memory flushes each row to disk as soon as the next one starts.
+    workbook = xlsxwriter.Workbook(str(path), {"constant_memory": True, "nan_inf_to_errors": True, "strings_to_urls": False})
+    try:
+        worksheet = workbook.add_worksheet()
+        row = 0
+        for chunk in chunks:
+            if row == 0:
+                worksheet.write_row(0, 0, [str(col) for col in chunk.columns])
+                row = 1
+            if row - 1 + len(chunk) > XLSX_MAX_ROWS:
+                raise ValueError(f"Too many rows for an Excel sheet (limit {XLSX_MAX_ROWS:,}); use CSV or Parquet")
+            values = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+            for record in values:
+                worksheet.write_row(row, 0, record)
+                row += 1
+    finally:
+        workbook.close()
+
+
+_WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
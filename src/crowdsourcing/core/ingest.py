@@ -0,0 +1,117 @@
+"""Chunked import of uploaded datasets."""
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+class IngestResult:
+    """Outcome of an import; truthy when the dataset was written."""
+
+    def __init__(self):
+        self.ok = False
+        self.error: Optional[str] = None
+        self.rows_read = 0
+        self.rows_written = 0
+        # Rows skipped because their id repeats an earlier row or an existing record.
+        self.duplicates = 0
+        self.ids_assigned = 0
+        self.dropped_columns: List[str] = []
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        return (
+            f"IngestResult(ok={self.ok}, rows_read={self.rows_read}, rows_written={self.rows_written}, "
+            f"duplicates={self.duplicates}, ids_assigned={self.ids_assigned})"
+        )
+
+
+def read_chunks(source: Any, chunksize: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield an uploaded CSV (path or file object) ``chunksize`` rows at a time."""
+    yield from pd.read_csv(source, chunksize=chunksize)
+
+
+class IdIndex:
+    """Sorted array of the ids taken so far, probed with binary search.
+
+    Keeps one int64 per record, far less than the set or concatenated frame
+    that de-duplication would otherwise need.
+    """
+
+    def __init__(self, ids: Optional[Any] = None):
+        values = pd.to_numeric(pd.Series(ids if ids is not None else [], dtype=object), errors="coerce")
+        self._ids = np.unique(values.dropna().to_numpy(dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def max(self) -> int:
+        return int(self._ids[-1]) if len(self._ids) else 0
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        if not len(self._ids):
+            return np.zeros(len(values), dtype=bool)
+        positions = np.searchsorted(self._ids, values).clip(max=len(self._ids) - 1)
+        return self._ids[positions] == values
+
+    def add(self, values: np.ndarray) -> None:
+        """Record ``values``, which must not be in the index yet."""
+        # Appending a sorted run and merging it in is much cheaper than union1d.
+        merged = np.concatenate([self._ids, np.unique(values.astype(np.int64))])
+        self._ids = np.sort(merged, kind="stable")
+
+
+class SchemaCoercer:
+    """Brings every chunk to the column order and dtypes of ``schema``."""
+
+    def __init__(self, schema: pd.Series):
+        self.schema = schema
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SchemaCoercer":
+        return cls(df.dtypes)
+
+    def unknown_columns(self, chunk: pd.DataFrame) -> List[str]:
+        return [column for column in chunk.columns if column not in self.schema.index]
+
+    def coerce(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk = chunk.reindex(columns=self.schema.index)
+        for column, dtype in self.schema.items():
+            values = chunk[column]
+            if values.dtype == dtype:
+                continue
+            if pd.api.types.is_bool_dtype(dtype):
+                chunk[column] = values.map({'True': True, 'False': False, True: True, False: False})
+            elif pd.api.types.is_integer_dtype(dtype):
+                values = pd.to_numeric(values, errors="coerce")
+                chunk[column] = values.astype(dtype) if values.notna().all() else values
+            elif pd.api.types.is_numeric_dtype(dtype):
+                chunk[column] = pd.to_numeric(values, errors="coerce").astype(dtype)
+            elif dtype == object:
+                chunk[column] = values.astype(object).where(values.notna(), None)
+        return chunk
+
+
+def assign_ids(chunk: pd.DataFrame, id_column: str, taken: IdIndex, next_id: int, result: IngestResult):
+    """Drop rows whose id is already taken and number rows that have none.
+
+    Returns the filtered chunk and the next free id.
+    """
+    ids = pd.to_numeric(chunk[id_column], errors="coerce")
+    known = ids.notna().to_numpy()
+    values = ids.fillna(0).to_numpy(dtype=np.int64)
+    duplicate = known & (taken.contains(values) | pd.Series(values).duplicated().to_numpy())
+    keep = ~duplicate
+    chunk = chunk.loc[keep].copy()
+    values, known = values[keep], known[keep]
+    missing = int((~known).sum())
+    values[~known] = np.arange(next_id, next_id + missing)
+    chunk[id_column] = values
+    taken.add(values)
+    result.duplicates += int(duplicate.sum())
+    result.ids_assigned += missing
+    return chunk, max(next_id + missing, taken.max() + 1)
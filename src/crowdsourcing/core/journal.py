@@ -0,0 +1,126 @@
+"""Append-only edit journal layered on top of the dataset snapshot."""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from crowdsourcing.core.cache import Signature, file_signature
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class EditJournal:
+    """JSON-lines log of row upserts and deletes.
+
+    Each save appends only the rows it changed, tagged with a timestamp, the
+    editor's token and region. Readers replay the log over the base snapshot;
+    :meth:`DataManager.compact` folds it into a new snapshot. While a
+    compaction runs, the log being folded is parked in ``<journal>.compacting``
+    so new edits keep going to a fresh journal file.
+    """
+
+    def __init__(self, data_path: Path):
+        data_path = Path(data_path)
+        self.path = data_path.with_name(f"{data_path.name}.journal.jsonl")
+        self.compacting_path = self.path.with_name(f"{self.path.name}.compacting")
+
+    def exists(self) -> bool:
+        return self.path.exists() or self.compacting_path.exists()
+
+    def size(self) -> int:
+        return sum((file_signature(path) or (0, 0))[1] for path in (self.path, self.compacting_path))
+
+    def signature(self) -> Optional[Signature]:
+        signatures = [sig for sig in map(file_signature, (self.compacting_path, self.path)) if sig]
+        if not signatures:
+            return None
+        return sum(signatures, ())
+
+    def append(
+        self,
+        upserts: pd.DataFrame,
+        deleted_ids: Iterable[Any],
+        id_column: str,
+        token: Optional[str] = None,
+        region: Optional[str] = None,
+    ) -> int:
+        """Durably append one batch of changes and return the number of entries."""
+        meta = {"ts": time.time(), "token": token, "region": region}
+        rows = upserts.astype(object).where(upserts.notna(), None).to_dict(orient="records")
+        lines = [json.dumps({**meta, "op": "upsert", "row": row}, default=_json_default) for row in rows]
+        lines += [
+            json.dumps({**meta, "op": "delete", "id": value}, default=_json_default)
+            for value in deleted_ids
+        ]
+        if not lines:
+            return 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+b") as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Terminate a torn line left by a crash so it stays isolated.
+                    lines.insert(0, "")
+            f.write(("\n".join(lines) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return len(lines)
+
+    def entries(self, include_active: bool = True) -> List[Dict[str, Any]]:
+        paths = [self.compacting_path] + ([self.path] if include_active else [])
+        entries = []
+        for path in paths:
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A crash mid-append can leave a torn last line.
+                        continue
+        return entries
+
+    def replay(self, id_column: str, include_active: bool = True) -> Tuple[pd.DataFrame, list]:
+        """Collapse the log to the final upserted rows and deleted ids."""
+        final: Dict[Any, Optional[Dict[str, Any]]] = {}
+        for entry in self.entries(include_active):
+            if entry.get("op") == "upsert":
+                row = entry["row"]
+                final.pop(row.get(id_column), None)
+                final[row.get(id_column)] = row
+            elif entry.get("op") == "delete":
+                final.pop(entry["id"], None)
+                final[entry["id"]] = None
+        upserts = pd.DataFrame([row for row in final.values() if row is not None])
+        deleted = [key for key, row in final.items() if row is None]
+        return upserts, deleted
+
+    def begin_compaction(self) -> None:
+        # Reuse a log left behind by an interrupted compaction; replaying it
+        # again is harmless because upserts and deletes are idempotent.
+        if not self.compacting_path.exists() and self.path.exists():
+            os.replace(self.path, self.compacting_path)
+
+    def finish_compaction(self) -> None:
+        try:
+            self.compacting_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        for path in (self.path, self.compacting_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,92 @@
+"""Advisory file locking for dataset writers."""
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class _LockState:
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.fd: Optional[int] = None
+        self.depth = 0
+
+
+class DatasetLock:
+    """Exclusive advisory lock held by a process while it rewrites a dataset.
+
+    The lock file also stores a generation counter that every writer bumps
+    before releasing the lock, so a process can tell whether the dataset was
+    rewritten since it last looked even when file timestamps are too coarse
+    to show it. The lock is re-entrant within a thread and also serializes
+    threads of the same process.
+    """
+
+    _states: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, data_path: Path):
+        data_path = Path(data_path)
+        self.path = data_path.with_name(f"{data_path.name}.lock")
+        key = str(self.path.resolve())
+        with self._registry_lock:
+            self._state = self._states.setdefault(key, _LockState())
+
+    def __enter__(self) -> "DatasetLock":
+        state = self._state
+        state.thread_lock.acquire()
+        if state.depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                state.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(state.fd, fcntl.LOCK_EX)
+            except Exception:
+                self._close()
+                state.thread_lock.release()
+                raise
+        state.depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        state = self._state
+        state.depth -= 1
+        if state.depth == 0:
+            self._close()
+        state.thread_lock.release()
+
+    def peek_generation(self) -> int:
+        """Read the generation without taking the lock."""
+        try:
+            raw = self.path.read_bytes()[:32].strip()
+        except FileNotFoundError:
+            return 0
+        return int(raw) if raw.isdigit() else 0
+
+    def generation(self) -> int:
+        """Return the writer generation; only valid while the lock is held."""
+        fd = self._state.fd
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = os.read(fd, 32).strip()
+        return int(raw) if raw.isdigit() else 0
+
+    def bump(self) -> int:
+        fd = self._state.fd
+        generation = self.generation() + 1
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(generation).encode())
+        return generation
+
+    def _close(self) -> None:
+        state = self._state
+        if state.fd is not None:
+            if fcntl is not None:
+                fcntl.flock(state.fd, fcntl.LOCK_UN)
+            os.close(state.fd)
+            state.fd = None
@@ -0,0 +1,211 @@
+"""Per-rerun phase timings, exported as JSON lines and Prometheus text."""
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_METRICS_DIR = "data/metrics"
+DEFAULT_WINDOW = 1000
+
+# Phase durations of the rerun running in the current thread.
+_current_rerun: ContextVar[Optional[Dict[str, float]]] = ContextVar("current_rerun", default=None)
+
+
+class Metrics:
+    """Collects phase durations in memory and optionally exports them.
+
+    The last ``window`` samples of every phase are kept for percentiles.
+    With ``METRICS`` enabled in the config, each rerun is also appended as
+    one JSON line to a size-rotated ``metrics.jsonl`` and a Prometheus
+    text-format ``metrics.prom`` is rewritten at most every
+    ``METRICS_EXPORT_SECONDS``.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._count: Dict[str, int] = {}
+        self._sum: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._settings: Optional[tuple] = None
+        self._logger: Optional[logging.Logger] = None
+        self._prometheus_path: Optional[Path] = None
+        self._export_interval = 10.0
+        self._last_export = 0.0
+
+    def configure(self, config: Dict[str, Any]) -> None:
+        settings = (
+            bool(config.get("METRICS")),
+            config.get("METRICS_DIR", DEFAULT_METRICS_DIR),
+            int(config.get("METRICS_LOG_MAX_MB", 10)),
+            int(config.get("METRICS_LOG_BACKUPS", 5)),
+            float(config.get("METRICS_EXPORT_SECONDS", 10)),
+        )
+        if settings == self._settings:
+            return
+        with self._lock:
+            enabled, directory, max_mb, backups, interval = settings
+            self._close_logger()
+            self._prometheus_path = None
+            if enabled:
+                directory = Path(directory)
+                directory.mkdir(parents=True, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    directory / "metrics.jsonl", maxBytes=max_mb * 1024 * 1024, backupCount=backups, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("crowdsourcing.metrics")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(handler)
+                self._logger = logger
+                self._prometheus_path = directory / "metrics.prom"
+            self._export_interval = interval
+            self._settings = settings
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._count[name] = self._count.get(name, 0) + 1
+            self._sum[name] = self._sum.get(name, 0.0) + seconds
+        phases = _current_rerun.get()
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def rerun(self) -> Iterator[Dict[str, float]]:
+        """Group the phases timed in the block into one rerun record."""
+        phases: Dict[str, float] = {}
+        token = _current_rerun.set(phases)
+        start = time.perf_counter()
+        try:
+            yield phases
+        finally:
+            _current_rerun.reset(token)
+            self.record("rerun", time.perf_counter() - start)
+            phases["rerun"] = time.perf_counter() - start
+            self._export(phases)
+
+    def summary(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [
+                {
+                    "phase": name,
+                    "count": self._count[name],
+                    "p50_ms": float(np.percentile(samples, 50)) * 1000,
+                    "p95_ms": float(np.percentile(samples, 95)) * 1000,
+                    "max_ms": max(samples) * 1000,
+                }
+                for name, samples in self._samples.items()
+                if samples
+            ]
+        columns = ["phase", "count", "p50_ms", "p95_ms", "max_ms"]
+        return pd.DataFrame(rows, columns=columns).sort_values("p95_ms", ascending=False, ignore_index=True)
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP crowdsourcing_phase_seconds Time spent in each phase of an app rerun.",
+            "# TYPE crowdsourcing_phase_seconds summary",
+        ]
+        with self._lock:
+            for name, samples in sorted(self._samples.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                for quantile in (0.5, 0.95):
+                    value = float(np.percentile(samples, quantile * 100)) if samples else 0.0
+                    lines.append(f'crowdsourcing_phase_seconds{{phase="{label}",quantile="{quantile}"}} {value:.6f}')
+                lines.append(f'crowdsourcing_phase_seconds_sum{{phase="{label}"}} {self._sum[name]:.6f}')
+                lines.append(f'crowdsourcing_phase_seconds_count{{phase="{label}"}} {self._count[name]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._count.clear()
+            self._sum.clear()
+
+    def _export(self, phases: Dict[str, float]) -> None:
+        try:
+            if self._logger is not None:
+                self._logger.info(json.dumps({"ts": time.time(), "pid": os.getpid(), "phases": phases}))
+            now = time.monotonic()
+            if self._prometheus_path is not None and now - self._last_export >= self._export_interval:
+                self._last_export = now
+                tmp_path = self._prometheus_path.with_name(f".{self._prometheus_path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(self.prometheus_text(), encoding="utf-8")
+                os.replace(tmp_path, self._prometheus_path)
+        except Exception as e:
+            print(f"Error exporting metrics: {str(e)}")
+
+    def _close_logger(self) -> None:
+        if self._logger is not None:
+            for handler in list(self._logger.handlers):
+                self._logger.removeHandler(handler)
+                handler.close()
+            self._logger = None
+
+
+metrics = Metrics()
+
+
+def timed(name: str) -> Callable:
+    """Decorator recording every call of the function as phase ``name``."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(config: Dict[str, Any]) -> Iterator[None]:
+    """Run the block under cProfile when ``PROFILE`` is set in the config.
+
+    Each profile is dumped to ``PROFILE_DIR`` (``<METRICS_DIR>/profiles`` by
+    default) and can be opened with ``python -m pstats`` or snakeviz.
+    """
+    if not config.get("PROFILE"):
+        yield
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another session is already being profiled (one profiler per process on 3.12+).
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        directory = Path(config.get("PROFILE_DIR", Path(config.get("METRICS_DIR", DEFAULT_METRICS_DIR)) / "profiles"))
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(directory / f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}.prof")
+        except Exception as e:
+            print(f"Error saving profile: {str(e)}")
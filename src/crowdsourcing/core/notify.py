@@ -0,0 +1,153 @@
+"""Change notifications for files shared by several app processes.
+
+When several Streamlit servers serve the same ``DATA_PATH``, a write in one
+of them has to reach the caches of the others. :class:`FileWatcher` calls
+subscribers as soon as a watched file changes, whichever process changed
+it: through inotify (via watchdog) where available, otherwise by polling
+file signatures.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from crowdsourcing.core.cache import Signature, file_signature
+
+DEFAULT_POLL_INTERVAL = 0.1
+WATCH_MODES = ("auto", "poll", "off")
+
+
+class FileWatcher:
+    """Runs callbacks shortly after a subscribed file is written, moved or deleted.
+
+    ``mode`` is ``"auto"`` (inotify through watchdog, polling if it is not
+    installed), ``"poll"`` or ``"off"``. Callbacks run on the watcher thread
+    and must be quick; exceptions are printed and swallowed.
+    """
+
+    def __init__(self, mode: str = "auto", interval: float = DEFAULT_POLL_INTERVAL):
+        if mode not in WATCH_MODES:
+            raise ValueError(f"Unknown file watch mode '{mode}'")
+        self.mode = mode
+        self.interval = interval
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self._keys: set = set()
+        self._lock = threading.Lock()
+        self._observer = None
+        self._directories: set = set()
+        self._poller: Optional[threading.Thread] = None
+        self._signatures: Dict[str, Optional[Signature]] = {}
+        self._stopped = threading.Event()
+
+    @property
+    def backend(self) -> str:
+        if self.mode == "off":
+            return "off"
+        return "inotify" if self._observer is not None else "poll"
+
+    def subscribe(self, path: Path, callback: Callable[[], None], key: Optional[str] = None) -> bool:
+        """Call ``callback`` whenever ``path`` changes.
+
+        A subscription with a ``key`` that was already used is ignored, so
+        objects created on every rerun can subscribe without piling up
+        callbacks. Returns whether the callback was added.
+        """
+        if self.mode == "off":
+            return False
+        path_key = _key(path)
+        with self._lock:
+            if key is not None:
+                if key in self._keys:
+                    return False
+                self._keys.add(key)
+            self._callbacks.setdefault(path_key, []).append(callback)
+            self._signatures.setdefault(path_key, file_signature(path_key))
+            self._start(Path(path_key).parent)
+        return True
+
+    def stop(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer = None
+            self._directories.clear()
+
+    def notify(self, path: str) -> None:
+        """Run the callbacks of ``path``; called by the watcher backends."""
+        callbacks = self._callbacks.get(path)
+        if not callbacks:
+            return
+        for callback in list(callbacks):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error handling change of {path}: {str(e)}")
+
+    def _start(self, directory: Path) -> None:
+        # Caller holds self._lock.
+        if self.mode == "auto" and self._watch_directory(directory):
+            return
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, name="file-watcher", daemon=True)
+            self._poller.start()
+
+    def _watch_directory(self, directory: Path) -> bool:
+        if str(directory) in self._directories:
+            return True
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path:
+                        watcher.notify(os.fsdecode(path))
+
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+            self._observer.schedule(Handler(), str(directory), recursive=False)
+        except OSError as e:
+            # Out of inotify watches, for instance; polling still works.
+            print(f"Falling back to polling for {directory}: {str(e)}")
+            return False
+        self._directories.add(str(directory))
+        return True
+
+    def _poll(self) -> None:
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                paths = [path for path in self._callbacks if str(Path(path).parent) not in self._directories]
+            for path in paths:
+                signature = file_signature(path)
+                if signature != self._signatures.get(path):
+                    self._signatures[path] = signature
+                    self.notify(path)
+
+
+def _key(path: Path) -> str:
+    return str(Path(path).resolve())
+
+
+_watcher: Optional[FileWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_file_watcher(mode: str = "auto") -> FileWatcher:
+    """Return the process-wide watcher, created with ``mode`` on first use."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = FileWatcher(mode)
+        return _watcher
+
@@ -0,0 +1,105 @@
+"""Per-region partition index over a dataset's filter column."""
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_keys(values: pd.Series) -> pd.Series:
+    """Normalize region values the same way region lookups do."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Lower-case each category once and expand through the codes.
+        keys = np.append(values.cat.categories.astype(str).str.lower().to_numpy(dtype=object), "nan")
+        return pd.Series(keys[values.cat.codes.to_numpy()], index=values.index)
+    return values.astype(str).str.lower()
+
+
+class RegionIndex:
+    """Maps each normalized region key to the row positions holding it.
+
+    ``codes`` stores the key code of every row so that the index can be
+    patched incrementally when rows are updated, deleted or appended, while
+    ``positions`` gives O(region size) lookups.
+    """
+
+    def __init__(self, column: str, codes: np.ndarray, keys: list):
+        self.column = column
+        self.codes = codes
+        self.keys = keys
+        self._code_of = {key: code for code, key in enumerate(keys)}
+        self.positions: Dict[int, np.ndarray] = {}
+        self._rebuild_positions(range(len(keys)))
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, column: str) -> "RegionIndex":
+        codes, uniques = pd.factorize(normalize_keys(df[column]))
+        return cls(column, codes.astype(np.int64), list(uniques))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def lookup(self, value: str) -> np.ndarray:
+        code = self._code_of.get(str(value).lower())
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.positions[code]
+
+    def regions(self) -> list:
+        return [key for code, key in enumerate(self.keys) if len(self.positions[code])]
+
+    def update(self, frame: pd.DataFrame, kept: np.ndarray, changed: np.ndarray) -> "RegionIndex":
+        """Patch the index after rows were deleted, modified or appended.
+
+        ``kept`` holds the old positions of surviving rows in their new order
+        (they occupy the first ``len(kept)`` rows of ``frame``); rows past
+        that point were appended. ``changed`` lists new positions whose region
+        value may have changed.
+        """
+        new_of_old = np.full(len(self.codes), -1, dtype=np.int64)
+        new_of_old[kept] = np.arange(len(kept))
+        removed = new_of_old < 0
+
+        index = RegionIndex.__new__(RegionIndex)
+        index.column = self.column
+        index.keys = list(self.keys)
+        index._code_of = dict(self._code_of)
+        index.codes = np.empty(len(frame), dtype=np.int64)
+        index.codes[: len(kept)] = self.codes[kept]
+
+        touched = np.union1d(np.asarray(changed, dtype=np.int64), np.arange(len(kept), len(frame)))
+        affected = set(np.unique(self.codes[removed]).tolist())
+        if len(touched):
+            affected.update(np.unique(index.codes[touched[touched < len(kept)]]).tolist())
+            index.codes[touched] = index._encode(normalize_keys(frame[self.column].iloc[touched]))
+            affected.update(np.unique(index.codes[touched]).tolist())
+
+        index.positions = {
+            code: new_of_old[positions]
+            for code, positions in self.positions.items()
+            if code not in affected
+        }
+        index._rebuild_positions(code for code in range(len(index.keys)) if code not in index.positions)
+        return index
+
+    def _encode(self, keys: pd.Series) -> np.ndarray:
+        codes = pd.Index(self.keys).get_indexer(keys)
+        missing = codes < 0
+        if missing.any():
+            for key in pd.unique(keys[missing]):
+                self._code_of[key] = len(self.keys)
+                self.keys.append(key)
+            codes[missing] = pd.Index(self.keys).get_indexer(keys[missing])
+        return codes.astype(np.int64)
+
+    def _rebuild_positions(self, codes: Iterable[int]) -> None:
+        codes = list(codes)
+        if not codes:
+            return
+        if len(codes) > 8:
+            order = np.argsort(self.codes, kind="stable")
+            bounds = np.searchsorted(self.codes[order], np.arange(len(self.keys) + 1))
+            for code in codes:
+                self.positions[code] = order[bounds[code]:bounds[code + 1]]
+        else:
+            for code in codes:
+                self.positions[code] = np.flatnonzero(self.codes == code)
@@ -0,0 +1,223 @@
+"""Declarative dataset schema read from the ``SCHEMA`` section of config.json.
+
+Each column declares its dtype and, optionally, a role and editor hints::
+
+    "SCHEMA": {
+        "country_name": {"dtype": "category", "role": "filter", "label": "Country"},
+        "heritage": {"dtype": "boolean", "label": "Heritage Site"},
+        "website": {"dtype": "string", "widget": "link"},
+        "id": {"dtype": "Int64", "role": "id"}
+    }
+
+``string`` columns are stored as ``string[pyarrow]`` when pyarrow is
+installed. Columns with the ``filter`` or ``id`` role are read-only in the
+editor unless ``editable`` says otherwise.
+"""
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+ROLES = ("filter", "id")
+
+# Spellings of booleans found in CSV files and SQLite integer columns.
+_BOOL_VALUES = {
+    True: True, False: False,
+    "True": True, "False": False, "true": True, "false": False,
+    "TRUE": True, "FALSE": False, "1": True, "0": False,
+}
+
+DEFAULT_SCHEMA: Dict[str, Dict[str, Any]] = {
+    "country_name": {"dtype": "category", "role": "filter", "label": "Country", "help": "Country name"},
+    "name": {"dtype": "string", "label": "Name", "help": "Museum name", "required": True},
+    "heritage": {"dtype": "boolean", "label": "Heritage Site", "help": "Check if this is a heritage site"},
+    "description": {"dtype": "string", "label": "Description", "help": "Description", "max_chars": 500},
+    "website": {"dtype": "string", "label": "Website", "help": "Website URL", "widget": "link"},
+    "id": {"dtype": "Int64", "role": "id", "label": "ID", "help": "Unique identifier"},
+}
+
+
+def _string_dtype() -> str:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "string"
+    return "string[pyarrow]"
+
+
+class ColumnSpec:
+    """Dtype, role and editor hints of one column."""
+
+    def __init__(
+        self,
+        name: str,
+        dtype: str = "string",
+        role: Optional[str] = None,
+        editable: Optional[bool] = None,
+        label: Optional[str] = None,
+        help: Optional[str] = None,
+        required: bool = False,
+        max_chars: Optional[int] = None,
+        widget: Optional[str] = None,
+    ):
+        if role is not None and role not in ROLES:
+            raise ValueError(f"Unknown role '{role}' for column '{name}'")
+        self.name = name
+        self.dtype = dtype
+        self.role = role
+        self.editable = role is None if editable is None else bool(editable)
+        self.label = label or name
+        self.help = help
+        self.required = bool(required)
+        self.max_chars = max_chars
+        self.widget = widget
+
+    @property
+    def pandas_dtype(self) -> str:
+        if self.dtype in ("string", "string[pyarrow]"):
+            return _string_dtype()
+        return self.dtype
+
+    @property
+    def kind(self) -> str:
+        """``category``, ``boolean``, ``integer``, ``float``, ``string`` or ``object``."""
+        if self.dtype == "category":
+            return "category"
+        if self.dtype in ("bool", "boolean"):
+            return "boolean"
+        if self.dtype.startswith(("string", "str")):
+            return "string"
+        if self.dtype.lower().startswith(("int", "uint")):
+            return "integer"
+        if self.dtype.lower().startswith("float"):
+            return "float"
+        return "object"
+
+
+class Schema:
+    """Ordered column specs with helpers to coerce frames to them."""
+
+    def __init__(self, columns: List[ColumnSpec]):
+        self.columns = {spec.name: spec for spec in columns}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["Schema"]:
+        """The configured schema, or ``None`` when the config has no ``SCHEMA``."""
+        section = config.get("SCHEMA")
+        if not section:
+            return None
+        return cls([ColumnSpec(name, **(spec or {})) for name, spec in section.items()])
+
+    def __contains__(self, column: object) -> bool:
+        return column in self.columns
+
+    def __getitem__(self, column: str) -> ColumnSpec:
+        return self.columns[column]
+
+    def column_with_role(self, role: str) -> Optional[str]:
+        return next((name for name, spec in self.columns.items() if spec.role == role), None)
+
+    @property
+    def editable_columns(self) -> List[str]:
+        return [name for name, spec in self.columns.items() if spec.editable]
+
+    def read_dtypes(self) -> Dict[str, str]:
+        """Dtypes to hand to the CSV parser.
+
+        Only text and category columns are parsed as typed; booleans and
+        integers are left to :meth:`apply`, which also accepts spellings such
+        as ``1.0`` or ``true`` that a strict parser would reject.
+        """
+        return {
+            name: spec.pandas_dtype
+            for name, spec in self.columns.items()
+            if spec.kind in ("category", "string")
+        }
+
+    def apply(self, df: pd.DataFrame, compact: bool = True) -> None:
+        """Coerce the columns of ``df`` in place; columns already typed are skipped.
+
+        With ``compact=False`` category columns are kept as plain objects,
+        which is what frames that are about to be merged into the dataset need.
+        """
+        for name in df.columns.intersection(list(self.columns)):
+            spec = self.columns[name]
+            values = df[name]
+            kind = spec.kind
+            if kind == "category":
+                if not compact:
+                    if isinstance(values.dtype, pd.CategoricalDtype):
+                        df[name] = values.astype(object)
+                elif not isinstance(values.dtype, pd.CategoricalDtype):
+                    df[name] = values.astype("category")
+            elif kind == "boolean":
+                if values.dtype == "boolean":
+                    continue
+                if values.dtype == object:
+                    values = values.map(_BOOL_VALUES, na_action="ignore")
+                df[name] = values.astype("boolean")
+            elif kind == "integer":
+                if values.dtype == spec.pandas_dtype:
+                    continue
+                numeric = pd.to_numeric(values, errors="coerce")
+                present = numeric.dropna()
+                if (present % 1 == 0).all():
+                    df[name] = numeric.astype(spec.pandas_dtype)
+                else:
+                    df[name] = numeric
+            elif kind == "float":
+                if values.dtype != spec.pandas_dtype:
+                    df[name] = pd.to_numeric(values, errors="coerce").astype(spec.pandas_dtype)
+            elif kind == "string":
+                if values.dtype != spec.pandas_dtype:
+                    df[name] = values.astype(spec.pandas_dtype)
+
+
+def infer_booleans(df: pd.DataFrame) -> None:
+    """Turn text columns holding only ``True``/``False`` into booleans, in place.
+
+    Used for datasets without a declared schema: CSV files store missing
+    booleans as empty cells, which makes pandas read the column as text.
+    """
+    for name in df.columns[df.dtypes == object]:
+        values = df[name]
+        present = values.dropna()
+        if present.empty or present.iloc[0] not in ("True", "False"):
+            continue
+        if present.isin(["True", "False", True, False]).all():
+            df[name] = values.map(_BOOL_VALUES, na_action="ignore")
+
+
+def concat_like(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """``pd.concat`` that keeps the first frame's category and extension dtypes.
+
+    The other frames are cast to those dtypes (new categories are appended,
+    which leaves existing codes untouched) so the result does not fall back
+    to ``object`` columns.
+    """
+    first, rest = frames[0], [frame for frame in frames[1:] if len(frame.columns)]
+    casts: Dict[str, Any] = {}
+    for name, dtype in first.dtypes.items():
+        if not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            incoming = [frame[name] for frame in rest if name in frame.columns]
+            if not incoming:
+                continue
+            values = pd.concat([series.astype(object) for series in incoming])
+            new = pd.Index(pd.unique(values.dropna())).difference(dtype.categories)
+            if len(new):
+                if first is frames[0]:
+                    first = first.copy(deep=False)
+                first[name] = first[name].cat.add_categories(new)
+                dtype = first[name].dtype
+        casts[name] = dtype
+    aligned = []
+    for frame in rest:
+        for name, dtype in casts.items():
+            if name in frame.columns and frame[name].dtype != dtype:
+                try:
+                    frame = frame.assign(**{name: frame[name].astype(dtype)})
+                except (TypeError, ValueError):
+                    pass
+        aligned.append(frame)
+    return pd.concat([first] + aligned, ignore_index=True)
@@ -0,0 +1,478 @@
+"""Storage backends for the crowdsourced dataset.
+
+The backend is picked from the ``DATA_PATH`` extension: ``.csv`` files are
+parsed as text, while ``.parquet`` and ``.feather``/``.arrow`` files are read
+through pyarrow with memory mapping and can push a region filter down to the
+reader so only the matching rows are materialized. ``.db``/``.sqlite`` files
+(or ``"STORAGE_BACKEND": "sqlite"``) use an indexed SQLite table that is
+updated row by row instead of being rewritten on every save.
+"""
+import itertools
+import os
+import shutil
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import pandas as pd
+
+from crowdsourcing.core.cache import Signature, file_signature
+
+
+class Storage:
+    """Reads and writes a whole dataset in one format."""
+
+    extensions: tuple = ()
+    supports_pushdown = False
+    supports_row_updates = False
+
+    def __init__(self, path: Path, **options: Any):
+        self.path = Path(path)
+        self.options = options
+
+    def signature(self) -> Optional[Signature]:
+        """Identify the stored version, for cache validation."""
+        return file_signature(self.path)
+
+    def read(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def write(self, df: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def write_atomic(self, df: pd.DataFrame) -> None:
+        """Write to a temporary file next to the target, then rename it into place."""
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            type(self)(tmp_path, **self.options).write(df)
+            os.replace(tmp_path, self.path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def read_filtered(self, column: str, value: str) -> pd.DataFrame:
+        """Return the rows whose ``column`` matches ``value`` case-insensitively."""
+        df = self.read()
+        return df[df[column].astype(str).str.lower() == value.lower()].reset_index(drop=True)
+
+    def read_columns(self, columns: List[str]) -> pd.DataFrame:
+        return self.read()[columns]
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        df = self.read()
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """Atomically replace the dataset with ``chunks``; returns rows written.
+
+        Chunks are written one at a time, so memory stays bounded by the
+        chunk size on backends that support incremental writes.
+        """
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            rows = type(self)(tmp_path, **self.options)._write_chunks_to(chunks)
+            os.replace(tmp_path, self.path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return rows
+
+    def append_chunks(self, chunks: Iterable[pd.DataFrame], chunksize: int = 50_000) -> int:
+        """Atomically append ``chunks``; returns the number of rows appended."""
+        appended = [0]
+
+        def counted():
+            for chunk in chunks:
+                appended[0] += len(chunk)
+                yield chunk
+
+        self.write_chunks(itertools.chain(self.iter_chunks(chunksize), counted()))
+        return appended[0]
+
+    def _write_chunks_to(self, chunks: Iterable[pd.DataFrame]) -> int:
+        frames = list(chunks)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        self.write(df)
+        return len(df)
+
+
+class CsvStorage(Storage):
+    """CSV file, parsed with pyarrow's multithreaded reader when a schema gives the dtypes."""
+
+    extensions = (".csv",)
+
+    def read(self) -> pd.DataFrame:
+        dtypes = self.options.get("dtypes")
+        if dtypes and _has_pyarrow():
+            try:
+                return pd.read_csv(self.path, engine="pyarrow", dtype=self._known(dtypes))
+            except (TypeError, ValueError) as e:
+                # Values the typed parser rejects are coerced after a plain read.
+                print(f"Falling back to the default CSV parser: {str(e)}")
+        return pd.read_csv(self.path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.path, index=False)
+
+    def read_columns(self, columns: List[str]) -> pd.DataFrame:
+        dtypes = {col: dtype for col, dtype in (self.options.get("dtypes") or {}).items() if col in columns}
+        return pd.read_csv(self.path, usecols=columns, dtype=dtypes or None)
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        yield from pd.read_csv(self.path, chunksize=chunksize)
+
+    def append_chunks(self, chunks: Iterable[pd.DataFrame], chunksize: int = 50_000) -> int:
+        # Text rows can be appended as-is: copy the file, append, swap it in.
+        header = list(pd.read_csv(self.path, nrows=0).columns)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        rows = 0
+        try:
+            shutil.copyfile(self.path, tmp_path)
+            with open(tmp_path, "a", newline="", encoding="utf-8") as f:
+                for chunk in chunks:
+                    chunk.reindex(columns=header).to_csv(f, header=False, index=False)
+                    rows += len(chunk)
+            os.replace(tmp_path, self.path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return rows
+
+    def _write_chunks_to(self, chunks: Iterable[pd.DataFrame]) -> int:
+        rows = 0
+        header = None
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            for chunk in chunks:
+                if header is None:
+                    header = list(chunk.columns)
+                    chunk.to_csv(f, index=False)
+                else:
+                    chunk.reindex(columns=header).to_csv(f, header=False, index=False)
+                rows += len(chunk)
+        return rows
+
+    def _known(self, dtypes: Dict[str, str]) -> Dict[str, str]:
+        header = pd.read_csv(self.path, nrows=0).columns
+        return {col: dtype for col, dtype in dtypes.items() if col in header}
+
+
+class ArrowStorage(Storage):
+    """Base for pyarrow-backed columnar formats."""
+
+    format = ""
+    supports_pushdown = True
+
+    def read_filtered(self, column: str, value: str) -> pd.DataFrame:
+        dataset = _pyarrow_dataset().dataset(self.path, format=self.format)
+        pc = _pyarrow_compute()
+        expression = pc.utf8_lower(pc.field(column).cast("string")) == value.lower()
+        return dataset.to_table(filter=expression).to_pandas()
+
+    def read_columns(self, columns: List[str]) -> pd.DataFrame:
+        dataset = _pyarrow_dataset().dataset(self.path, format=self.format)
+        return dataset.to_table(columns=columns).to_pandas()
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        dataset = _pyarrow_dataset().dataset(self.path, format=self.format)
+        for batch in dataset.to_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+    def _write_chunks_to(self, chunks: Iterable[pd.DataFrame]) -> int:
+        import pyarrow as pa
+
+        writer = None
+        rows = 0
+        try:
+            for chunk in chunks:
+                # Each chunk would carry its own dictionary, which the IPC file
+                # format cannot hold; category columns are written as plain text.
+                chunk = _without_categories(chunk)
+                if writer is None:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    writer = self._open_writer(table.schema)
+                else:
+                    # Later chunks are cast to the first chunk's schema.
+                    table = pa.Table.from_pandas(
+                        chunk.reindex(columns=writer_schema.names), schema=writer_schema, preserve_index=False, safe=False
+                    )
+                writer_schema = table.schema
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            self.write(pd.DataFrame())
+        return rows
+
+    def _open_writer(self, schema):
+        raise NotImplementedError
+
+
+class ParquetStorage(ArrowStorage):
+    extensions = (".parquet", ".pq")
+    format = "parquet"
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_parquet(self.path, engine="pyarrow", memory_map=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_parquet(self.path, engine="pyarrow", index=False)
+
+    def _open_writer(self, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(self.path, schema)
+
+
+class FeatherStorage(ArrowStorage):
+    extensions = (".feather", ".arrow")
+    format = "feather"
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_feather(self.path, memory_map=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.reset_index(drop=True).to_feather(self.path)
+
+    def _open_writer(self, schema):
+        import pyarrow as pa
+
+        return pa.ipc.new_file(str(self.path), schema)
+
+
+class SqliteStorage(Storage):
+    """Dataset stored in one SQLite table, indexed on the filter and id columns.
+
+    The database runs in WAL mode so region views can be read while another
+    session is saving, and saves only touch the rows that changed.
+    """
+
+    extensions = (".db", ".sqlite", ".sqlite3")
+    supports_pushdown = True
+    supports_row_updates = True
+    table = "records"
+
+    def __init__(self, path: Path, filter_column: str = "country_name", id_column: str = "id", **options: Any):
+        super().__init__(path, filter_column=filter_column, id_column=id_column, **options)
+        self.filter_column = filter_column
+        self.id_column = id_column
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def signature(self) -> Optional[Signature]:
+        # Committed writes land in the -wal file until the next checkpoint.
+        signature = file_signature(self.path)
+        if signature is None:
+            return None
+        return signature + (file_signature(Path(f"{self.path}-wal")) or ())
+
+    def read(self) -> pd.DataFrame:
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(f"SELECT * FROM {self.table}", conn)
+
+    def read_columns(self, columns: List[str]) -> pd.DataFrame:
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(f"SELECT {', '.join(map(_quote, columns))} FROM {self.table}", conn)
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        with closing(self.connect()) as conn:
+            yield from pd.read_sql_query(f"SELECT * FROM {self.table}", conn, chunksize=chunksize)
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame]) -> int:
+        return self._insert_chunks(chunks, replace=True)
+
+    def append_chunks(self, chunks: Iterable[pd.DataFrame], chunksize: int = 50_000) -> int:
+        return self._insert_chunks(chunks, replace=False)
+
+    def _insert_chunks(self, chunks: Iterable[pd.DataFrame], replace: bool) -> int:
+        rows = 0
+        with closing(self.connect()) as conn, conn:
+            for chunk in chunks:
+                chunk.to_sql(self.table, conn, if_exists="replace" if replace and rows == 0 else "append", index=False)
+                if replace and rows == 0:
+                    self._create_indexes(conn, chunk.columns)
+                rows += len(chunk)
+        return rows
+
+    def read_filtered(self, column: str, value: str) -> pd.DataFrame:
+        query = f"SELECT * FROM {self.table} WHERE {_quote(column)} = ? COLLATE NOCASE"
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(query, conn, params=(value,))
+
+    def read_page(
+        self,
+        column: str,
+        value: str,
+        offset: int,
+        limit: int,
+        search: Optional[str] = None,
+        search_columns: Optional[List[str]] = None,
+    ) -> Tuple[pd.DataFrame, int]:
+        """Return one page of a region's rows, optionally searched, and the match count."""
+        where = f"{_quote(column)} = ? COLLATE NOCASE"
+        params: list = [value]
+        with closing(self.connect()) as conn:
+            if search:
+                if search_columns is None:
+                    search_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+                pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                where += " AND (" + " OR ".join(
+                    f"CAST({_quote(col)} AS TEXT) LIKE ? ESCAPE '\\'" for col in search_columns
+                ) + ")"
+                params += [pattern] * len(search_columns)
+            total = conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {where}", params).fetchone()[0]
+            page = pd.read_sql_query(
+                f"SELECT * FROM {self.table} WHERE {where} ORDER BY rowid LIMIT ? OFFSET ?",
+                conn,
+                params=params + [int(limit), int(offset)],
+            )
+        return page, int(total)
+
+    def read_rows(self, ids: Iterable[Any]) -> pd.DataFrame:
+        ids = [_to_python(value) for value in ids]
+        with closing(self.connect()) as conn:
+            frames = [
+                pd.read_sql_query(
+                    f"SELECT * FROM {self.table} WHERE {_quote(self.id_column)} IN ({','.join('?' * len(chunk))})",
+                    conn,
+                    params=chunk,
+                )
+                for chunk in _chunks(ids, 500)
+            ]
+            if not frames:
+                return pd.read_sql_query(f"SELECT * FROM {self.table} LIMIT 0", conn)
+        return pd.concat(frames, ignore_index=True)
+
+    def max_id(self) -> Optional[int]:
+        with closing(self.connect()) as conn:
+            value = conn.execute(f"SELECT MAX({_quote(self.id_column)}) FROM {self.table}").fetchone()[0]
+        return None if value is None else int(value)
+
+    def write(self, df: pd.DataFrame) -> None:
+        with closing(self.connect()) as conn, conn:
+            df.to_sql(self.table, conn, if_exists="replace", index=False)
+            self._create_indexes(conn, df.columns)
+
+    def write_atomic(self, df: pd.DataFrame) -> None:
+        # Replacing the database file would orphan its -wal file; the
+        # transaction in write() is already atomic.
+        self.write(df)
+
+    def apply_changes(self, upserts: pd.DataFrame, deleted_ids: Iterable[Any]) -> None:
+        """Upsert ``upserts`` and delete ``deleted_ids`` in a single transaction."""
+        deleted_ids = [(_to_python(value),) for value in deleted_ids]
+        with closing(self.connect()) as conn, conn:
+            if not upserts.empty:
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+                for col in upserts.columns:
+                    if col not in existing:
+                        conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {_quote(col)}")
+                columns = ", ".join(_quote(col) for col in upserts.columns)
+                placeholders = ", ".join("?" * len(upserts.columns))
+                updates = ", ".join(
+                    f"{_quote(col)} = excluded.{_quote(col)}" for col in upserts.columns if col != self.id_column
+                )
+                conn.executemany(
+                    f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT({_quote(self.id_column)}) DO UPDATE SET {updates}",
+                    [tuple(_to_python(value) for value in row) for row in upserts.itertuples(index=False)],
+                )
+            if deleted_ids:
+                conn.executemany(
+                    f"DELETE FROM {self.table} WHERE {_quote(self.id_column)} = ?", deleted_ids
+                )
+
+    def _create_indexes(self, conn: sqlite3.Connection, columns: Iterable[str]) -> None:
+        columns = list(columns)
+        if self.id_column in columns:
+            conn.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{self.table}_id "
+                f"ON {self.table} ({_quote(self.id_column)})"
+            )
+        if self.filter_column in columns:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table}_filter "
+                f"ON {self.table} ({_quote(self.filter_column)} COLLATE NOCASE)"
+            )
+
+
+STORAGE_BACKENDS: Dict[str, Type[Storage]] = {
+    extension: backend
+    for backend in (CsvStorage, ParquetStorage, FeatherStorage, SqliteStorage)
+    for extension in backend.extensions
+}
+
+
+def get_storage(path: Path, backend: Optional[str] = None, **options: Any) -> Storage:
+    """Return the storage backend for ``path``, chosen by its file extension."""
+    path = Path(path)
+    suffix = backend if backend is not None else path.suffix.lower()
+    if suffix and not suffix.startswith("."):
+        suffix = f".{suffix}"
+    try:
+        return STORAGE_BACKENDS[suffix](path, **options)
+    except KeyError:
+        raise ValueError(f"Unsupported data file format: {path.name}") from None
+
+
+def migrate_dataset(source: Path, destination: Path) -> int:
+    """Convert a dataset between storage formats and return the row count."""
+    from crowdsourcing.core.data_manager import DataManager
+
+    df = DataManager({"DATA_PATH": str(source)}).load_data()
+    if df.empty:
+        raise ValueError(f"No data found in {source}")
+    Path(destination).parent.mkdir(parents=True, exist_ok=True)
+    get_storage(destination).write(df)
+    return len(df)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _to_python(value: Any) -> Any:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _chunks(values: list, size: int) -> Iterable[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _without_categories(df: pd.DataFrame) -> pd.DataFrame:
+    categorical = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    return df.astype({col: object for col in categorical}) if categorical else df
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pyarrow_dataset():
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Parquet/Feather datasets") from e
+    return ds
+
+
+def _pyarrow_compute():
+    try:
+        import pyarrow.compute as pc
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Parquet/Feather datasets") from e
+    return pc
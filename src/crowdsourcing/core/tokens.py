@@ -0,0 +1,190 @@
+"""Token registry used to resolve access tokens to regions."""
+import csv
+import hashlib
+import os
+import secrets
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from crowdsourcing.core.cache import Signature, file_signature
+from crowdsourcing.core.locking import DatasetLock
+from crowdsourcing.core.notify import get_file_watcher
+
+# Tokens are kept only as keyed digests; the key never leaves the process.
+_DIGEST_KEY = secrets.token_bytes(32)
+
+
+def hash_token(token: str) -> bytes:
+    return hashlib.blake2b(str(token).strip().encode("utf-8"), key=_DIGEST_KEY, digest_size=16).digest()
+
+
+class TokenRegistry:
+    """Maps token digests to regions, reloading the token file when it changes.
+
+    Lookups are a single dict access. The file is parsed with the csv module
+    (no pandas on the auth path) and only when its mtime, size or inode moved.
+    """
+
+    def __init__(self, token_file: Path):
+        self.path = Path(token_file)
+        self._regions: Dict[bytes, str] = {}
+        self._signature: Optional[Signature] = None
+        self._lock = threading.Lock()
+        self._static = False
+
+    @classmethod
+    def from_mapping(cls, tokens: Dict[str, str]) -> "TokenRegistry":
+        registry = cls(Path(os.devnull))
+        registry._regions = {hash_token(token): region for token, region in tokens.items()}
+        registry._static = True
+        return registry
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._regions)
+
+    def __contains__(self, token: object) -> bool:
+        return self.get(token) is not None
+
+    def get(self, token: object, default: Optional[str] = None) -> Optional[str]:
+        if not token:
+            return default
+        self.refresh()
+        return self._regions.get(hash_token(str(token)), default)
+
+    def reload(self) -> None:
+        """Re-read the token file now; used when a change notification arrives."""
+        if self._static:
+            return
+        with self._lock:
+            self._signature = file_signature(self.path)
+            self._regions = dict(self._parse())
+
+    def refresh(self) -> None:
+        if self._static:
+            return
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return
+        with self._lock:
+            signature = file_signature(self.path)
+            if signature != self._signature:
+                self._regions = dict(self._parse())
+                self._signature = signature
+
+    def _parse(self) -> Iterable[Tuple[bytes, str]]:
+        if not self.path.exists():
+            return []
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return [
+                (hash_token(row["token"]), (row.get("country") or "").strip())
+                for row in csv.DictReader(f)
+                if row.get("token")
+            ]
+
+
+def ensure_token_file(token_file: Path) -> None:
+    """Create a token file holding only the default admin token if it is missing."""
+    token_file = Path(token_file)
+    if token_file.exists():
+        return
+    token_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(token_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["token", "country"])
+        writer.writerow(["admin", "admin"])
+
+
+# Lowercase letters and digits without look-alikes (0/o, 1/l/i).
+TOKEN_ALPHABET = "abcdefghjkmnpqrstuvwxyz23456789"
+TOKEN_LENGTH = 10  # the login form accepts at most 10 characters
+
+
+def read_token_rows(token_file: Path) -> List[Tuple[str, str]]:
+    token_file = Path(token_file)
+    if not token_file.exists():
+        return []
+    with open(token_file, newline="", encoding="utf-8") as f:
+        return [
+            (row["token"].strip(), (row.get("country") or "").strip())
+            for row in csv.DictReader(f)
+            if row.get("token")
+        ]
+
+
+def provision_tokens(token_file: Path, regions: Iterable[object], length: int = TOKEN_LENGTH) -> List[Tuple[str, str]]:
+    """Create one token for every region in ``regions`` that has none yet.
+
+    Regions are compared case-insensitively against the token file. New
+    tokens are checked against every existing and newly drawn token, and the
+    whole file is replaced atomically under a lock, so concurrent admins
+    cannot lose each other's tokens. Returns the new ``(token, region)`` rows.
+    """
+    token_file = Path(token_file)
+    token_file.parent.mkdir(parents=True, exist_ok=True)
+    with DatasetLock(token_file):
+        rows = read_token_rows(token_file)
+        taken = {token for token, _ in rows}
+        covered = {region.lower() for _, region in rows}
+        new_rows = []
+        for region in regions:
+            if region is None or region != region:  # None or NaN
+                continue
+            region = str(region).strip()
+            if not region or region.lower() in covered:
+                continue
+            covered.add(region.lower())
+            new_rows.append((_new_token(taken, length), region))
+        if new_rows:
+            _write_token_rows(token_file, rows + new_rows)
+    return new_rows
+
+
+def add_token(token_file: Path, region: str, length: int = TOKEN_LENGTH) -> str:
+    """Create one more token for ``region``, even if it already has some."""
+    token_file = Path(token_file)
+    token_file.parent.mkdir(parents=True, exist_ok=True)
+    with DatasetLock(token_file):
+        rows = read_token_rows(token_file)
+        token = _new_token({token for token, _ in rows}, length)
+        _write_token_rows(token_file, rows + [(token, str(region).strip())])
+    return token
+
+
+def _new_token(taken: set, length: int) -> str:
+    token = "".join(secrets.choice(TOKEN_ALPHABET) for _ in range(length))
+    while token in taken:
+        token = "".join(secrets.choice(TOKEN_ALPHABET) for _ in range(length))
+    taken.add(token)
+    return token
+
+
+def _write_token_rows(token_file: Path, rows: List[Tuple[str, str]]) -> None:
+    tmp_path = token_file.with_name(f".{token_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["token", "country"])
+            writer.writerows(rows)
+        os.replace(tmp_path, token_file)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+_registries: Dict[str, TokenRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_token_registry(token_file: Path) -> TokenRegistry:
+    """Return the process-wide registry for ``token_file``."""
+    key = str(Path(token_file).resolve())
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            ensure_token_file(Path(token_file))
+            registry = _registries[key] = TokenRegistry(Path(token_file))
+            # Tokens added by another process are live before anyone logs in with them.
+            get_file_watcher().subscribe(registry.path, registry.reload, key=f"tokens:{key}")
+    return registry
@@ -1,13 +1,24 @@
 """Main entry point for the crowdsourcing application."""
 import json
 import streamlit as st
-import pandas as pd
+from contextlib import ExitStack
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.data_manager import DataManager, VERSION_COLUMN
 from crowdsourcing.core.config import load_config, save_config
-from crowdsourcing.admin.dashboard import render_admin_page
+from crowdsourcing.core.metrics import metrics, profiled
+from crowdsourcing.core.schema import DEFAULT_SCHEMA, ColumnSpec, Schema
+from crowdsourcing.core.tokens import TokenRegistry, get_token_registry
+from crowdsourcing.ui.editor import (
+    apply_pending,
+    changes_from_editor_state,
+    count_changes,
+    empty_changes,
+    merge_changes,
+)
+from crowdsourcing.ui.columns import column_config
+from crowdsourcing.ui.export import render_export_controls
 
 def render_home_page(config: Dict[str, Any]) -> Optional[str]:
     """Render the home page with token input."""
@@ -36,79 +47,131 @@ def render_navigation():
             st.query_params.clear()
             st.rerun()
 
-def load_tokens(token_file: str) -> Dict[str, str]:
+def load_tokens(token_file: str) -> TokenRegistry:
     """Load and validate tokens."""
     try:
-        Path(token_file).parent.mkdir(parents=True, exist_ok=True)
-        if not Path(token_file).exists():
-            # Create default token file
-            tokens_df = pd.DataFrame({
-                'token': ['admin'],
-                'country': ['admin']
-            })
-            tokens_df.to_csv(token_file, index=False)
-            return dict(zip(tokens_df["token"], tokens_df["country"]))
-            
-        tokens_df = pd.read_csv(token_file)
-        return dict(zip(tokens_df["token"], tokens_df["country"]))
+        return get_token_registry(token_file)
     except Exception as e:
         st.error(f"Error loading tokens: {str(e)}")
-        return {'admin': 'admin'}  # Default admin token
+        return TokenRegistry.from_mapping({'admin': 'admin'})  # Default admin token
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Editor columns for configs written before the SCHEMA section existed.
+DEFAULT_COLUMNS = [ColumnSpec(name, **spec) for name, spec in DEFAULT_SCHEMA.items()]
+
+def _set_page(key: str, page: int) -> None:
+    st.session_state[key] = page
 
 def render_country_page(data_manager: DataManager, country: str, config: Dict[str, Any]):
     """Render the country-specific interface."""
     st.subheader(f"Museum Data for {country}")
     
     try:
-        country_data = data_manager.get_filtered_data("country_name", country)
+        state = st.session_state
+        page_key = f"page_{country}"
+        pending_key = f"pending_{country}"
+        pending = state.get(pending_key) or empty_changes()
+
+        # Search and paging controls; the region is sliced server-side.
+        search_col, column_col, size_col = st.columns([3, 2, 1])
+        with search_col:
+            search = st.text_input(
+                "Search", key=f"search_{country}", on_change=_set_page, args=(page_key, 1)
+            ).strip()
+        with column_col:
+            columns = [
+                col for col in data_manager.preview(1).columns
+                if col not in (config["FILTER_COLUMN"], VERSION_COLUMN)
+            ]
+            search_in = st.selectbox(
+                "Search in", ["All columns"] + columns,
+                key=f"search_in_{country}", on_change=_set_page, args=(page_key, 1)
+            )
+        with size_col:
+            page_size = st.selectbox(
+                "Rows per page", PAGE_SIZES, index=1,
+                key=f"page_size_{country}", on_change=_set_page, args=(page_key, 1)
+            )
+        search_columns = None if search_in == "All columns" else [search_in]
+
+        page = max(int(state.get(page_key, 1)), 1)
+        page_data, total = data_manager.get_page(
+            config["FILTER_COLUMN"], country, (page - 1) * page_size, page_size, search or None, search_columns
+        )
+        pages = max(-(-total // page_size), 1)
+        if page > pages:
+            page = state[page_key] = pages
+            page_data, total = data_manager.get_page(
+                config["FILTER_COLUMN"], country, (page - 1) * page_size, page_size, search or None, search_columns
+            )
         
-        if country_data.empty:
+        if total == 0 and not search:
             st.warning(f"No museum data available for {country}")
             return
+
+        # Edits made on the previously shown page are folded into the pending
+        # delta (keyed by id) before the editor is rebuilt for the new view.
+        generation = state.get('editor_generation', 0)
+        view_key = f"{page}_{page_size}_{search_in}_{search}"
+        last = state.get(f"last_view_{country}")
+        if last is not None and last[0] != view_key:
+            pending = merge_changes(pending, changes_from_editor_state(last[2], state.get(last[1])))
+            state[pending_key] = pending
+            state[f"folds_{country}"] = state.get(f"folds_{country}", 0) + 1
+        # A new key per fold so a revisited page starts from a clean delta.
+        editor_key = f"editor_{country}_{generation}_{state.get(f'folds_{country}', 0)}"
+        country_data = apply_pending(page_data.reset_index(drop=True), pending)
+        state[f"last_view_{country}"] = (view_key, editor_key, country_data[["id", VERSION_COLUMN]].copy())
+
+        with metrics.phase("render_editor"):
+            st.data_editor(
+                country_data,
+                key=editor_key,
+                num_rows="dynamic",
+                use_container_width=True,
+                column_config=column_config(data_manager.schema or Schema(DEFAULT_COLUMNS)),
+                hide_index=True
+            )
+
+        prev_col, info_col, next_col = st.columns([1, 4, 1])
+        with prev_col:
+            st.button("◀ Previous", disabled=page <= 1, on_click=_set_page, args=(page_key, page - 1))
+        with info_col:
+            st.caption(f"Page {page} of {pages} · {total:,} record(s)")
+        with next_col:
+            st.button("Next ▶", disabled=page >= pages, on_click=_set_page, args=(page_key, page + 1))
         
-        edited_df = st.data_editor(
-            country_data,
-            num_rows="dynamic",
-            use_container_width=True,
-            column_config={
-                "country_name": st.column_config.TextColumn(
-                    "Country",
-                    help="Country name",
-                    disabled=True
-                ),
-                "name": st.column_config.TextColumn(
-                    "Name",
-                    help="Museum name",
-                    required=True
-                ),
-                "heritage": st.column_config.CheckboxColumn(
-                    "Heritage Site",
-                    help="Check if this is a heritage site"
-                ),
-                "description": st.column_config.TextColumn(
-                    "Description",
-                    help="Description",
-                    max_chars=500
-                ),
-                "website": st.column_config.LinkColumn(
-                    "Website",
-                    help="Website URL"
-                ),
-                "id": st.column_config.NumberColumn(
-                    "ID",
-                    help="Unique identifier",
-                    disabled=True
-                )
-            },
-            hide_index=True
-        )
-        
-        if st.button("Save Changes"):
-            if data_manager.update_records(edited_df):
-                st.success("Changes saved successfully!")
-            else:
+        changes = merge_changes(pending, changes_from_editor_state(country_data, state.get(editor_key)))
+        pending_count = count_changes(changes)
+        if pending_count:
+            st.caption(f"✏️ {pending_count} unsaved change(s)")
+
+        if st.button("Save Changes", disabled=not pending_count):
+            result = data_manager.apply_changes(
+                changes,
+                filter_col=config["FILTER_COLUMN"],
+                filter_value=country,
+                token=state.token
+            )
+            if not result:
                 st.error("Error saving changes")
+            else:
+                state.editor_generation = generation + 1
+                state.pop(pending_key, None)
+                state.pop(f"last_view_{country}", None)
+                if result.conflicts:
+                    ids = ", ".join(str(value) for value in result.conflicts)
+                    st.warning(
+                        f"Some rows were changed by someone else while you were editing and were "
+                        f"not saved (ID: {ids}). Reload the page to see the latest values."
+                    )
+                else:
+                    st.success("Changes saved successfully!")
                 
+        with st.expander("Download data"):
+            render_export_controls(data_manager, [country], key=f"export_{country}")
+
     except Exception as e:
         st.error(f"Error displaying data: {str(e)}")
 
@@ -124,63 +187,73 @@ def load_css():
 
 def main():
     """Main application entry point."""
-    try:
-        # Load configuration
-        config = load_config()
+    with metrics.rerun(), ExitStack() as profiling:
+        try:
+            # Load configuration
+            with metrics.phase("load_config"):
+                config = load_config()
+            metrics.configure(config)
+            profiling.enter_context(profiled(config))
         
-        # Configure Streamlit page
-        st.set_page_config(
-            page_title=config["APP_TITLE"],
-            page_icon=config["APP_ICON"],
-            layout="wide"
-        )
+            # Configure Streamlit page
+            st.set_page_config(
+                page_title=config["APP_TITLE"],
+                page_icon=config["APP_ICON"],
+                layout="wide"
+            )
         
-        # Load custom CSS
-        load_css()
+            # Load custom CSS
+            load_css()
         
-        # Initialize session state
-        if "token" not in st.session_state:
-            st.session_state.token = st.query_params.get("token", None)
+            # Initialize session state
+            if "token" not in st.session_state:
+                st.session_state.token = st.query_params.get("token", None)
         
-        # Render navigation
-        render_navigation()
+            # Render navigation
+            render_navigation()
         
-        # Load tokens and initialize data manager
-        tokens = load_tokens(config["TOKEN_FILE"])
-        data_manager = DataManager(config)
+            # Load tokens and initialize data manager
+            with metrics.phase("load_tokens"):
+                tokens = load_tokens(config["TOKEN_FILE"])
+            data_manager = DataManager(config)
         
-        # Sidebar
-        st.sidebar.title("Navigation")
-        st.sidebar.markdown(config["HELP_TEXT"])
+            # Sidebar
+            st.sidebar.title("Navigation")
+            st.sidebar.markdown(config["HELP_TEXT"])
         
-        # Main content
-        if not st.session_state.token:
-            input_token = render_home_page(config)
-            if input_token:
-                if input_token in tokens:
-                    st.session_state.token = input_token
-                    st.query_params["token"] = input_token
-                    st.rerun()
-                else:
-                    st.error("Invalid token. Please try again.")
-        else:
-            # Get user's country or admin status
-            country = tokens.get(st.session_state.token)
-            
-            if country == "admin":
-                render_admin_page(config, data_manager.load_data())
+            # Main content
+            if not st.session_state.token:
+                with metrics.phase("render_home"):
+                    input_token = render_home_page(config)
+                if input_token:
+                    if input_token in tokens:
+                        st.session_state.token = input_token
+                        st.query_params["token"] = input_token
+                        st.rerun()
+                    else:
+                        st.error("Invalid token. Please try again.")
             else:
-                render_country_page(data_manager, country, config)
+                # Get user's country or admin status
+                country = tokens.get(st.session_state.token)
+            
+                if country == "admin":
+                    # Admin-only code (uploads, exports) is imported on first use.
+                    from crowdsourcing.admin.dashboard import render_admin_page
+                    with metrics.phase("render_admin"):
+                        render_admin_page(config, data_manager)
+                else:
+                    with metrics.phase("render_country"):
+                        render_country_page(data_manager, country, config)
             
-            # Logout button
-            if st.sidebar.button("Logout"):
-                st.session_state.token = None
-                st.query_params.clear()
-                st.rerun()
+                # Logout button
+                if st.sidebar.button("Logout"):
+                    st.session_state.token = None
+                    st.query_params.clear()
+                    st.rerun()
         
-    except Exception as e:
-        st.error(f"Application error: {str(e)}")
-        st.error("Please check your configuration and data files.")
+        except Exception as e:
+            st.error(f"Application error: {str(e)}")
+            st.error("Please check your configuration and data files.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""Editor column settings derived from the dataset schema."""
+from typing import Any, Dict
+
+import streamlit as st
+
+from crowdsourcing.core.data_manager import VERSION_COLUMN
+from crowdsourcing.core.schema import ColumnSpec, Schema
+
+def column_config(schema: Schema) -> Dict[str, Any]:
+    """Build the ``column_config`` for ``st.data_editor`` from ``schema``.
+
+    Columns that are not editable (by default those with the ``filter`` or
+    ``id`` role) are disabled, and the row version stamp is hidden.
+    """
+    config: Dict[str, Any] = {name: _column(spec) for name, spec in schema.columns.items()}
+    config[VERSION_COLUMN] = None
+    return config
+
+def _column(spec: ColumnSpec) -> Any:
+    options = {"help": spec.help, "disabled": not spec.editable, "required": spec.required}
+    if spec.widget == "link":
+        return st.column_config.LinkColumn(spec.label, max_chars=spec.max_chars, **options)
+    if spec.kind == "boolean":
+        return st.column_config.CheckboxColumn(spec.label, **options)
+    if spec.kind in ("integer", "float"):
+        return st.column_config.NumberColumn(spec.label, step=1 if spec.kind == "integer" else None, **options)
+    if spec.kind == "category" and spec.editable:
+        # Offers the categories already present in the column.
+        return st.column_config.SelectboxColumn(spec.label, **options)
+    return st.column_config.TextColumn(spec.label, max_chars=spec.max_chars, **options)
@@ -0,0 +1,78 @@
+"""Helpers for turning st.data_editor edit state into dataset changes."""
+from typing import Any, Dict
+
+import pandas as pd
+
+from crowdsourcing.core.data_manager import VERSION_COLUMN
+
+def changes_from_editor_state(view: pd.DataFrame, state: Dict[str, Any], id_column: str = "id") -> Dict[str, Any]:
+    """Convert the positional delta kept by st.data_editor into an id-keyed delta.
+
+    ``view`` is the frame that was passed to the editor and ``state`` its
+    session state value (``edited_rows``, ``added_rows``, ``deleted_rows``).
+    The result is the ``changes`` mapping accepted by
+    ``DataManager.apply_changes``.
+    """
+    state = state or {}
+    ids = view[id_column].tolist()
+    versions = view[VERSION_COLUMN].tolist() if VERSION_COLUMN in view.columns else None
+
+    edited = {ids[int(pos)]: dict(cells) for pos, cells in (state.get("edited_rows") or {}).items()}
+    deleted_positions = [int(pos) for pos in state.get("deleted_rows") or []]
+    deleted = [ids[pos] for pos in deleted_positions]
+    # A row that was edited and then deleted only needs the delete.
+    for row_id in deleted:
+        edited.pop(row_id, None)
+    added = [dict(row) for row in state.get("added_rows") or [] if row]
+
+    changes = {"edited": edited, "added": added, "deleted": deleted}
+    if versions is not None:
+        touched = [int(pos) for pos in (state.get("edited_rows") or {})] + deleted_positions
+        changes["versions"] = {ids[pos]: int(versions[pos]) for pos in touched}
+    return changes
+
+def count_changes(changes: Dict[str, Any]) -> int:
+    """Number of edited cells plus added and deleted rows."""
+    return (
+        sum(len(cells) for cells in changes.get("edited", {}).values())
+        + len(changes.get("added", []))
+        + len(changes.get("deleted", []))
+    )
+
+def empty_changes() -> Dict[str, Any]:
+    return {"edited": {}, "added": [], "deleted": [], "versions": {}}
+
+def merge_changes(base: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two id-keyed deltas, ``new`` taking precedence.
+
+    Used to carry edits made on one page of a region while the user moves to
+    another. A row keeps the version it had when it was first touched, so
+    conflict detection still compares against what the user originally saw.
+    """
+    deleted = list(dict.fromkeys(list(base.get("deleted", [])) + list(new.get("deleted", []))))
+    edited = {row_id: dict(cells) for row_id, cells in base.get("edited", {}).items()}
+    for row_id, cells in new.get("edited", {}).items():
+        edited.setdefault(row_id, {}).update(cells)
+    for row_id in deleted:
+        edited.pop(row_id, None)
+    versions = {**new.get("versions", {}), **base.get("versions", {})}
+    return {
+        "edited": edited,
+        "added": list(base.get("added", [])) + list(new.get("added", [])),
+        "deleted": deleted,
+        "versions": versions,
+    }
+
+def apply_pending(view: pd.DataFrame, changes: Dict[str, Any], id_column: str = "id") -> pd.DataFrame:
+    """Show not-yet-saved edits from other pages on a freshly read page."""
+    if not changes.get("edited") and not changes.get("deleted"):
+        return view
+    view = view[~view[id_column].isin(changes.get("deleted", []))].copy()
+    positions = pd.Index(view[id_column]).get_indexer(list(changes.get("edited", {})))
+    for pos, cells in zip(positions, changes.get("edited", {}).values()):
+        if pos < 0:
+            continue
+        for col, value in cells.items():
+            if col in view.columns:
+                view.iloc[pos, view.columns.get_loc(col)] = value
+    return view.reset_index(drop=True)
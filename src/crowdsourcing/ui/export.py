@@ -0,0 +1,45 @@
+"""Download controls for dataset exports."""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+
+from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.exports import EXPORT_FORMATS, EXPORT_MIME_TYPES, DatasetExporter
+
+ALL_REGIONS = "All regions"
+
+def render_export_controls(data_manager: DataManager, regions: List[str], key: str) -> None:
+    """Let the user pick a scope and format, build the export once and offer it for download.
+
+    ``regions`` lists the scopes to choose from; ``None`` in the list stands
+    for the whole dataset.
+    """
+    exporter = DatasetExporter(data_manager)
+    scope_col, format_col = st.columns([3, 1])
+    with scope_col:
+        region = st.selectbox(
+            "Records", regions, key=f"{key}_scope",
+            format_func=lambda value: ALL_REGIONS if value is None else str(value)
+        )
+    with format_col:
+        fmt = st.selectbox("Format", EXPORT_FORMATS, key=f"{key}_format")
+
+    ready: Optional[Path] = exporter.path_for(fmt, region)
+    if not ready.exists():
+        ready = None
+        if st.button("Prepare Export", key=f"{key}_prepare"):
+            try:
+                with st.spinner("Writing export..."):
+                    ready = exporter.export(fmt, region)
+            except Exception as e:
+                st.error(f"Error exporting data: {str(e)}")
+    if ready is not None:
+        # Built once per dataset version; reruns only read the finished file.
+        st.download_button(
+            f"Download {ready.stat().st_size / 1e6:,.1f} MB",
+            data=ready.read_bytes(),
+            file_name=exporter.file_name(fmt, region),
+            mime=EXPORT_MIME_TYPES[fmt],
+            key=f"{key}_download",
+        )
@@ -18,4 +18,26 @@ def test_save_config(temp_config_file, sample_config):
 def test_save_config_bad_path(sample_config):
     """Test saving configuration to invalid path raises exception"""
     with pytest.raises(Exception):
-        save_config(sample_config, "/invalid/path/config.json")
\ No newline at end of file
+        save_config(sample_config, "/invalid/path/config.json")
+def test_admin_page_loads_dataset_only_for_dataset_section(tmp_path, sample_config, sample_museums_df, monkeypatch):
+    """Test the token and configuration sections never load the dataset"""
+    from streamlit.testing.v1 import AppTest
+    from crowdsourcing.core.data_manager import DataManager
+
+    config = {**sample_config, "DATA_PATH": str(tmp_path / "data.csv"), "TOKEN_FILE": str(tmp_path / "tokens.csv")}
+    DataManager(config).save_data(sample_museums_df)
+    (tmp_path / "tokens.csv").write_text("token,country\nadmin,admin\n")
+    monkeypatch.setattr(DataManager, "load_data", lambda *args, **kwargs: pytest.fail("dataset loaded"))
+
+    def app(config):
+        from crowdsourcing.admin.dashboard import render_admin_page
+        from crowdsourcing.core.data_manager import DataManager
+        render_admin_page(config, DataManager(config))
+
+    at = AppTest.from_function(app, args=(config,)).run()
+    at.radio(key="admin_section").set_value("Token Management").run()
+    assert not at.exception
+    assert at.get("download_button")
+    at.radio(key="admin_section").set_value("Dataset Management").run()
+    assert not at.exception
+    assert len(at.dataframe[0].value) == 2
@@ -0,0 +1,43 @@
+"""Tests for the process-wide dataset cache"""
+import os
+import pandas as pd
+from crowdsourcing.core.cache import DatasetCache
+from crowdsourcing.core.data_manager import DataManager
+
+def test_cache_serves_until_file_changes(tmp_path, sample_museums_df):
+    path = tmp_path / "data.csv"
+    sample_museums_df.to_csv(path, index=False)
+    cache = DatasetCache()
+    cache.put(path, sample_museums_df)
+    assert cache.get(path) is sample_museums_df
+
+    sample_museums_df.head(1).to_csv(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert cache.get(path) is None
+
+def test_cache_evicts_least_recently_used(tmp_path, sample_museums_df):
+    paths = [tmp_path / f"data{i}.csv" for i in range(3)]
+    for path in paths:
+        sample_museums_df.to_csv(path, index=False)
+    cache = DatasetCache()
+    entry_size = cache.put(paths[0], sample_museums_df).nbytes
+    cache.resize(entry_size * 2)
+    cache.put(paths[1], sample_museums_df)
+    cache.get(paths[0])
+    cache.put(paths[2], sample_museums_df)
+    assert cache.get(paths[0]) is not None
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[2]) is not None
+
+def test_data_manager_reuses_parsed_frame(sample_config, tmp_path, sample_museums_df):
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(tmp_path / "data.csv")
+    manager = DataManager(config)
+    manager.save_data(sample_museums_df)
+    first = DataManager(config)._load_frame()
+    assert DataManager(config)._load_frame() is first
+
+    # External writes invalidate the cached copy
+    pd.concat([sample_museums_df, sample_museums_df.assign(id=[3, 4])]).to_csv(config["DATA_PATH"], index=False)
+    assert len(DataManager(config).load_data()) == 4
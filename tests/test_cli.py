@@ -0,0 +1,36 @@
+"""Tests for the command line interface"""
+import json
+
+from crowdsourcing import cli
+from crowdsourcing.core import config as config_module
+from crowdsourcing.core.cache import dataset_cache
+from crowdsourcing.core.data_manager import DataManager
+
+def test_load_config_rereads_only_on_change(tmp_path, monkeypatch, sample_config):
+    monkeypatch.chdir(tmp_path)
+    first = config_module.load_config()
+    assert (tmp_path / "data" / "config.json").exists()
+
+    cached = config_module.load_config()
+    cached["APP_TITLE"] = "Mutated"
+    assert config_module.load_config()["APP_TITLE"] == first["APP_TITLE"]
+
+    (tmp_path / "data" / "config.json").write_text(json.dumps({**sample_config, "APP_TITLE": "Changed title"}))
+    assert config_module.load_config()["APP_TITLE"] == "Changed title"
+
+def test_run_warm_preloads_caches(tmp_path, monkeypatch, sample_config, sample_museums_df):
+    monkeypatch.chdir(tmp_path)
+    config = {**sample_config, "DATA_PATH": str(tmp_path / "data.csv"), "TOKEN_FILE": str(tmp_path / "tokens.csv")}
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "config.json").write_text(json.dumps(config))
+    DataManager(config).save_data(sample_museums_df)
+    dataset_cache.invalidate()
+
+    launched = []
+    from streamlit.web import cli as streamlit_cli
+    monkeypatch.setattr(streamlit_cli, "main", lambda args, standalone_mode: launched.append(args))
+
+    assert cli.main(["run", "--warm"]) == 0
+    assert launched and launched[0][0] == "run"
+    entry = dataset_cache.get_entry(tmp_path / "data.csv", DataManager(config)._signature())
+    assert entry is not None and "region_index:country_name" in entry.extras
@@ -0,0 +1,50 @@
+"""Stress tests for concurrent writers sharing one dataset"""
+import multiprocessing
+import pandas as pd
+import pytest
+from crowdsourcing.core.data_manager import DataManager
+
+WRITERS = 4
+ROUNDS = 10
+
+def _writer(config, worker):
+    manager = DataManager(config)
+    region = f"Region {worker}"
+    for round_ in range(ROUNDS):
+        # Each writer edits its own region...
+        rows = manager.get_filtered_data('country_name', region)
+        edited = rows.assign(description=f"{worker}-{round_}")
+        assert manager.update_records(edited, filter_col='country_name', filter_value=region, original_df=rows)
+        # ...and all of them increment a shared counter, retrying on conflict.
+        while True:
+            rows = manager.get_filtered_data('country_name', 'Shared')
+            edited = rows.assign(name=str(int(rows['name'].iloc[0]) + 1))
+            result = manager.update_records(edited, original_df=rows)
+            assert result
+            if not result.conflicts:
+                break
+
+@pytest.mark.parametrize("suffix", [".csv", ".db"])
+def test_concurrent_writers_lose_no_updates(tmp_path, sample_config, suffix):
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(tmp_path / f"data{suffix}")
+    regions = [f"Region {worker}" for worker in range(WRITERS)] + ['Shared']
+    DataManager(config).save_data(pd.DataFrame({
+        'country_name': regions,
+        'name': ['museum'] * WRITERS + ['0'],
+        'description': [''] * len(regions),
+        'id': range(1, len(regions) + 1),
+    }))
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_writer, args=(config, worker)) for worker in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    result = DataManager(config).load_data().set_index('country_name')
+    assert int(result.loc['Shared', 'name']) == WRITERS * ROUNDS
+    for worker in range(WRITERS):
+        assert result.loc[f"Region {worker}", 'description'] == f"{worker}-{ROUNDS - 1}"
@@ -2,7 +2,8 @@
 import pytest
 import pandas as pd
 from pathlib import Path
-from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.data_manager import DataManager, VERSION_COLUMN
+from crowdsourcing.core.region_index import RegionIndex
 
 @pytest.fixture
 def data_manager(sample_config, temp_csv_file):
@@ -44,4 +45,118 @@ def test_save_data_with_invalid_path(sample_config, sample_museums_df):
     config["DATA_PATH"] = "/invalid/path/file.csv"
     manager = DataManager(config)
     success = manager.save_data(sample_museums_df)
-    assert not success
\ No newline at end of file
+    assert not success
+def test_update_records_updates_by_id(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    edited = sample_museums_df.iloc[[1]].copy()
+    edited['description'] = 'Updated'
+    assert data_manager.update_records(edited)
+    result = data_manager.load_data()
+    assert list(result['description']) == ['Desc 1', 'Updated']
+    assert list(result['id']) == [1, 2]
+
+def test_update_records_inserts_and_deletes(data_manager, sample_museums_df):
+    other = sample_museums_df.iloc[[0]].assign(country_name='Zambia', id=3)
+    data_manager.save_data(pd.concat([sample_museums_df, other], ignore_index=True))
+    edited = sample_museums_df.iloc[[0]].copy()
+    new_row = pd.DataFrame({'name': ['Museum 4'], 'heritage': [True]})
+    edited = pd.concat([edited, new_row], ignore_index=True)
+
+    assert data_manager.update_records(edited, filter_col='country_name', filter_value='malawi')
+    result = data_manager.load_data()
+    assert list(result['id']) == [1, 3, 4]
+    inserted = result[result['id'] == 4].iloc[0]
+    assert inserted['country_name'] == 'malawi'
+    assert inserted['heritage'] == True
+    assert result['id'].dtype == 'int64'
+
+def test_get_filtered_data_is_case_insensitive(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    filtered = data_manager.get_filtered_data('country_name', 'MALAWI')
+    assert list(filtered['id']) == [1, 2]
+    assert data_manager.get_filtered_data('country_name', 'Zambia').empty
+
+def test_region_index_follows_updates_and_appends(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    data_manager.get_filtered_data('country_name', 'Malawi')
+
+    edited = sample_museums_df.iloc[[1]].assign(country_name='Zambia')
+    assert data_manager.update_records(edited)
+    assert data_manager.append_records(sample_museums_df.iloc[[0]].assign(id=3))
+
+    index = data_manager.get_region_index('country_name')
+    rebuilt = RegionIndex.build(data_manager.load_data(), 'country_name')
+    for region in ['malawi', 'zambia']:
+        assert list(index.lookup(region)) == list(rebuilt.lookup(region))
+    assert list(data_manager.get_filtered_data('country_name', 'Malawi')['id']) == [1, 3]
+    assert list(data_manager.get_filtered_data('country_name', 'Zambia')['id']) == [2]
+
+def test_update_records_bumps_versions_of_changed_rows(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    edited = sample_museums_df.copy()
+    edited.loc[0, 'description'] = 'Updated'
+    assert data_manager.update_records(edited)
+    assert list(data_manager.load_data()[VERSION_COLUMN]) == [1, 0]
+
+def test_update_records_reports_conflicts(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    first = data_manager.get_filtered_data('country_name', 'Malawi')
+    second = first.copy()
+
+    first_edit = first.copy()
+    first_edit.loc[first_edit['id'] == 1, 'description'] = 'First'
+    assert not data_manager.update_records(first_edit, original_df=first).conflicts
+
+    second_edit = second.copy()
+    second_edit.loc[second_edit['id'] == 1, 'description'] = 'Second'
+    second_edit.loc[second_edit['id'] == 2, 'description'] = 'Second'
+    result = data_manager.update_records(
+        second_edit, filter_col='country_name', filter_value='Malawi', original_df=second
+    )
+    assert result and result.conflicts == [1]
+    assert list(data_manager.load_data()['description']) == ['First', 'Second']
+
+def test_apply_changes_edits_adds_and_deletes(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    result = data_manager.apply_changes(
+        {
+            "edited": {2: {"description": "Updated", "heritage": True}},
+            "added": [{"name": "Museum 3"}],
+            "deleted": [1],
+        },
+        filter_col='country_name',
+        filter_value='Malawi',
+    )
+    assert result and not result.conflicts
+    df = data_manager.load_data()
+    assert list(df['id']) == [2, 3]
+    assert df['description'].iloc[0] == 'Updated'
+    assert df['heritage'].iloc[0] == True
+    assert df['country_name'].iloc[1] == 'Malawi'
+    assert df['name'].iloc[0] == 'Museum 2'
+
+def test_apply_changes_checks_read_versions(data_manager, sample_museums_df):
+    data_manager.save_data(sample_museums_df)
+    assert data_manager.apply_changes({"edited": {1: {"name": "First"}}, "versions": {1: 0}})
+    result = data_manager.apply_changes({"edited": {1: {"name": "Second"}}, "versions": {1: 0}})
+    assert result.conflicts == [1]
+    assert data_manager.load_data()['name'].iloc[0] == 'First'
+
+@pytest.mark.parametrize("suffix", [".csv", ".db"])
+def test_get_page_slices_and_searches_region(tmp_path, sample_config, suffix):
+    config = {**sample_config, "DATA_PATH": str(tmp_path / f"data{suffix}")}
+    data_manager = DataManager(config)
+    df = pd.DataFrame({
+        'country_name': ['Malawi'] * 5 + ['Zambia'],
+        'name': ['Alpha', 'Beta', 'Gamma', 'Alpine', 'Delta', 'Alps'],
+        'id': [1, 2, 3, 4, 5, 6],
+    })
+    data_manager.save_data(df)
+
+    page, total = data_manager.get_page('country_name', 'malawi', offset=2, limit=2)
+    assert total == 5
+    assert list(page['id']) == [3, 4]
+
+    page, total = data_manager.get_page('country_name', 'Malawi', search='alp', search_columns=['name'])
+    assert total == 2
+    assert list(page['name']) == ['Alpha', 'Alpine']
@@ -0,0 +1,38 @@
+"""Tests for dataset exports"""
+import pandas as pd
+import pytest
+from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.exports import DatasetExporter
+
+@pytest.fixture
+def exporter(tmp_path, sample_config, sample_museums_df):
+    config = {**sample_config, "DATA_PATH": str(tmp_path / "data.csv")}
+    data_manager = DataManager(config)
+    df = pd.concat([sample_museums_df, sample_museums_df.assign(country_name='Zambia', id=[3, 4])], ignore_index=True)
+    data_manager.save_data(df)
+    return DatasetExporter(data_manager, tmp_path / "exports", chunksize=1)
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "xlsx"])
+def test_export_streams_all_records(exporter, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    if fmt == "xlsx":
+        pytest.importorskip("openpyxl")  # only needed to read the file back
+    path = exporter.export(fmt)
+    read = {"csv": pd.read_csv, "parquet": pd.read_parquet, "xlsx": pd.read_excel}[fmt]
+    df = read(path)
+    assert list(df['id']) == [1, 2, 3, 4]
+    assert '_version' not in df.columns
+
+def test_export_is_cached_per_dataset_version(exporter):
+    first = exporter.export("csv", "zambia")
+    assert list(pd.read_csv(first)['id']) == [3, 4]
+    mtime = first.stat().st_mtime_ns
+    assert exporter.export("csv", "zambia") == first
+    assert first.stat().st_mtime_ns == mtime
+
+    exporter.data_manager.apply_changes({"deleted": [3]}, filter_col="country_name", filter_value="Zambia")
+    second = exporter.export("csv", "zambia")
+    assert second != first
+    assert not first.exists()
+    assert list(pd.read_csv(second)['id']) == [4]
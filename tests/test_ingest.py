@@ -0,0 +1,77 @@
+"""Tests for chunked dataset imports"""
+import io
+
+import pandas as pd
+import pytest
+from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.ingest import IdIndex, read_chunks
+
+def _upload(df):
+    return io.StringIO(df.to_csv(index=False))
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".db"])
+def test_ingest_appends_in_chunks(tmp_path, sample_config, sample_museums_df, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(tmp_path / f"data{suffix}")
+    dm = DataManager(config)
+    assert dm.save_data(sample_museums_df)
+
+    upload = pd.DataFrame({
+        'country_name': ['Zambia'] * 5,
+        'name': [f'Museum {i}' for i in range(5)],
+        'heritage': ['True', 'False', 'True', 'False', 'True'],
+        'description': ['New'] * 5,
+        'website': ['http://example.com'] * 5,
+        'id': [1, None, 10, 10, None],
+        'extra': ['x'] * 5,
+    })
+    calls = []
+    result = dm.ingest(read_chunks(_upload(upload), chunksize=2), progress=calls.append)
+
+    assert result
+    assert len(calls) == 3
+    assert result.rows_read == 5
+    assert result.duplicates == 2  # id 1 exists already, id 10 repeats
+    assert result.ids_assigned == 2
+    assert result.dropped_columns == ['extra']
+    loaded = DataManager(config).load_data()
+    assert len(loaded) == 5
+    assert loaded['id'].is_unique
+    assert sorted(loaded['id']) == [1, 2, 3, 10, 11]
+    assert set(loaded['heritage']) <= {True, False}
+    assert 'extra' not in loaded.columns
+
+def test_ingest_replace_streams_new_dataset(tmp_path, sample_config, sample_museums_df):
+    dm = DataManager({**sample_config, "DATA_PATH": str(tmp_path / "data.csv")})
+    dm.save_data(sample_museums_df)
+    upload = pd.DataFrame({'country_name': ['Chad'] * 3, 'name': ['A', 'B', 'C']})
+
+    result = dm.ingest(read_chunks(_upload(upload), chunksize=2), mode="replace")
+
+    assert result
+    loaded = dm.load_data()
+    assert loaded['country_name'].tolist() == ['Chad'] * 3
+    assert loaded['id'].tolist() == [1, 2, 3]
+
+def test_ingest_folds_journal_before_append(tmp_path, sample_config, sample_museums_df):
+    config = {**sample_config, "DATA_PATH": str(tmp_path / "data.csv"), "JOURNAL": True}
+    dm = DataManager(config)
+    dm.save_data(sample_museums_df)
+    edited = dm.get_filtered_data('country_name', 'Malawi')
+    edited.loc[edited['id'] == 1, 'name'] = 'Edited'
+    assert dm.update_records(edited, filter_col='country_name', filter_value='Malawi')
+
+    result = dm.ingest(read_chunks(_upload(sample_museums_df.assign(id=None)), chunksize=1))
+
+    assert result.rows_written == 2
+    loaded = DataManager(config).load_data()
+    assert loaded['id'].tolist() == [1, 2, 3, 4]
+    assert loaded.loc[loaded['id'] == 1, 'name'].item() == 'Edited'
+
+def test_id_index_contains():
+    index = IdIndex([5, 1, 3])
+    assert index.contains(pd.Series([0, 1, 4, 5, 9]).to_numpy()).tolist() == [False, True, False, True, False]
+    index.add(pd.Series([4]).to_numpy())
+    assert index.max() == 5 and len(index) == 4
@@ -0,0 +1,56 @@
+"""Tests for the append-only edit journal"""
+import pandas as pd
+import pytest
+from crowdsourcing.core.data_manager import DataManager
+
+@pytest.fixture
+def journal_manager(tmp_path, sample_config, sample_museums_df):
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(tmp_path / "data.csv")
+    config["JOURNAL"] = True
+    manager = DataManager(config)
+    manager.save_data(sample_museums_df)
+    return manager
+
+def test_update_appends_only_changed_rows(journal_manager, sample_museums_df):
+    base_before = journal_manager.data_path.read_bytes()
+    edited = sample_museums_df.copy()
+    edited.loc[1, 'description'] = 'Updated'
+    edited = edited.iloc[[1]]
+    assert journal_manager.update_records(edited, filter_col='country_name', filter_value='Malawi', token='abc')
+
+    assert journal_manager.data_path.read_bytes() == base_before
+    entries = journal_manager.journal.entries()
+    assert [(e['op'], e['token'], e['region']) for e in entries] == [
+        ('upsert', 'abc', 'Malawi'), ('delete', 'abc', 'Malawi')
+    ]
+    assert entries[0]['row']['id'] == 2
+    assert entries[1]['id'] == 1
+
+    journal_manager.cache.invalidate()
+    result = journal_manager.load_data()
+    assert list(result['id']) == [2]
+    assert result['description'].iloc[0] == 'Updated'
+
+def test_torn_journal_line_is_ignored(journal_manager, sample_museums_df):
+    edited = sample_museums_df.assign(description='Updated')
+    journal_manager.update_records(edited)
+    with open(journal_manager.journal.path, "a") as f:
+        f.write('{"op": "upsert", "row": {"id"')
+    journal_manager.update_records(edited.iloc[[0]].assign(name='Renamed'))
+
+    journal_manager.cache.invalidate()
+    result = journal_manager.load_data()
+    assert list(result['name']) == ['Renamed', 'Museum 2']
+    assert list(result['description']) == ['Updated', 'Updated']
+
+def test_compact_folds_journal_into_snapshot(journal_manager, sample_museums_df):
+    journal_manager.update_records(sample_museums_df.iloc[[0]].assign(description='Updated'))
+    journal_manager.append_records(pd.DataFrame({'country_name': ['Zambia'], 'name': ['New']}))
+    expected = journal_manager.load_data()
+
+    assert journal_manager.compact()
+    assert not journal_manager.journal.exists()
+    journal_manager.cache.invalidate()
+    pd.testing.assert_frame_equal(journal_manager.load_data(), expected)
+    assert list(pd.read_csv(journal_manager.data_path)['id']) == [1, 2, 3]
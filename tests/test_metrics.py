@@ -0,0 +1,41 @@
+"""Tests for phase timing and metrics export"""
+import json
+
+from crowdsourcing.core.data_manager import DataManager
+from crowdsourcing.core.metrics import Metrics, metrics, profiled
+
+def test_rerun_groups_phases_and_exports(tmp_path):
+    recorder = Metrics()
+    recorder.configure({"METRICS": True, "METRICS_DIR": str(tmp_path), "METRICS_EXPORT_SECONDS": 0})
+    for _ in range(3):
+        with recorder.rerun():
+            with recorder.phase("load_config"):
+                pass
+            with recorder.phase("load_config"):
+                pass
+
+    summary = recorder.summary().set_index("phase")
+    assert summary.loc["load_config", "count"] == 6
+    assert summary.loc["rerun", "count"] == 3
+    lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert len(lines) == 3
+    assert set(json.loads(lines[0])["phases"]) == {"load_config", "rerun"}
+    prom = (tmp_path / "metrics.prom").read_text()
+    assert 'crowdsourcing_phase_seconds{phase="load_config",quantile="0.95"}' in prom
+    assert 'crowdsourcing_phase_seconds_count{phase="rerun"} 3' in prom
+    recorder.configure({})
+
+def test_data_manager_calls_are_timed(tmp_path, sample_config, sample_museums_df):
+    data_manager = DataManager({**sample_config, "DATA_PATH": str(tmp_path / "data.csv")})
+    metrics.reset()
+    data_manager.save_data(sample_museums_df)
+    data_manager.get_filtered_data("country_name", "Malawi")
+    phases = set(metrics.summary()["phase"])
+    assert {"data_manager.save_data", "data_manager.get_filtered_data"} <= phases
+
+def test_profiled_dumps_stats_when_enabled(tmp_path):
+    with profiled({"PROFILE": True, "PROFILE_DIR": str(tmp_path)}):
+        sum(range(1000))
+    with profiled({}):
+        pass
+    assert len(list(tmp_path.glob("*.prof"))) == 1
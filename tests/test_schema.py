@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from crowdsourcing.core.data_manager import VERSION_COLUMN, DataManager
+from crowdsourcing.core.schema import DEFAULT_SCHEMA, Schema
+
+@pytest.fixture
+def schema_config(tmp_path, sample_config):
+    return {**sample_config, "DATA_PATH": str(tmp_path / "data.csv"), "SCHEMA": DEFAULT_SCHEMA}
+
+def test_apply_uses_declared_dtypes():
+    df = pd.DataFrame({
+        'country_name': ['Malawi', 'Kenya'] * 500,
+        'name': ['Museum'] * 1000,
+        'heritage': ['True', None] * 500,
+        'description': [None, 'Desc'] * 500,
+        'website': ['http://example.com'] * 1000,
+        'id': [float(i) for i in range(1000)],
+    })
+    before = df.memory_usage(deep=True).sum()
+    Schema.from_config({"SCHEMA": DEFAULT_SCHEMA}).apply(df)
+
+    assert isinstance(df['country_name'].dtype, pd.CategoricalDtype)
+    assert df['heritage'].dtype == 'boolean'
+    assert df['heritage'].isna().sum() == 500
+    assert df['id'].dtype == 'Int64'
+    assert pd.api.types.is_string_dtype(df['name'])
+    assert df.memory_usage(deep=True).sum() < before
+
+def test_schema_roles():
+    schema = Schema.from_config({"SCHEMA": DEFAULT_SCHEMA})
+    assert schema.column_with_role("filter") == 'country_name'
+    assert schema.column_with_role("id") == 'id'
+    assert 'id' not in schema.editable_columns
+    assert 'name' in schema.editable_columns
+    assert Schema.from_config({}) is None
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet", "db"])
+def test_typed_dataset_round_trip(tmp_path, schema_config, sample_museums_df, suffix):
+    config = {**schema_config, "DATA_PATH": str(tmp_path / f"data.{suffix}")}
+    manager = DataManager(config)
+    manager.save_data(sample_museums_df)
+    manager.cache.invalidate()
+
+    df = manager.load_data()
+    assert isinstance(df['country_name'].dtype, pd.CategoricalDtype)
+    assert df['heritage'].dtype == 'boolean'
+    assert df['id'].dtype == 'Int64'
+
+    new_row = pd.DataFrame({'country_name': ['Kenya'], 'name': ['New'], 'heritage': [None]})
+    assert manager.update_records(new_row, filter_col='country_name', filter_value='Kenya')
+    manager.cache.invalidate()
+    df = manager.load_data()
+    assert isinstance(df['country_name'].dtype, pd.CategoricalDtype)
+    assert sorted(df['country_name'].astype(str)) == ['Kenya', 'Malawi', 'Malawi']
+    assert len(manager.get_filtered_data('country_name', 'kenya')) == 1
+
+def test_edit_from_missing_boolean_is_saved(schema_config, sample_museums_df):
+    manager = DataManager(schema_config)
+    manager.save_data(sample_museums_df.assign(heritage=[None, False]))
+    malawi = manager.get_filtered_data('country_name', 'Malawi')
+    malawi.loc[malawi['id'] == 1, 'heritage'] = True
+
+    assert manager.update_records(malawi, filter_col='country_name', filter_value='Malawi')
+    df = manager.load_data()
+    assert df.loc[df['id'] == 1, 'heritage'].iloc[0] == True  # noqa: E712
+    assert df.loc[df['id'] == 1, VERSION_COLUMN].iloc[0] == 1
+
+def test_apply_changes_skips_read_only_columns(schema_config, sample_museums_df):
+    manager = DataManager(schema_config)
+    manager.save_data(sample_museums_df)
+    changes = {"edited": {1: {"country_name": "Kenya", "name": "Renamed"}}, "added": [], "deleted": []}
+
+    assert manager.apply_changes(changes, filter_col='country_name', filter_value='Malawi')
+    row = manager.load_data().set_index('id').loc[1]
+    assert row['country_name'] == 'Malawi'
+    assert row['name'] == 'Renamed'
+
+def test_column_config_follows_schema():
+    from crowdsourcing.ui.columns import column_config
+
+    config = column_config(Schema.from_config({"SCHEMA": DEFAULT_SCHEMA}))
+    assert config[VERSION_COLUMN] is None
+    assert config['id']['disabled'] is True
+    assert config['country_name']['disabled'] is True
+    assert config['name']['required'] is True
+    assert config['heritage']['type_config']['type'] == 'checkbox'
+    assert config['website']['type_config']['type'] == 'link'
+
+def test_country_page_renders_typed_columns(schema_config, sample_museums_df):
+    from streamlit.testing.v1 import AppTest
+
+    DataManager(schema_config).save_data(sample_museums_df)
+
+    def app(config):
+        import streamlit as st
+        from crowdsourcing.core.data_manager import DataManager
+        from crowdsourcing.main import render_country_page
+        st.session_state.setdefault("token", "test")
+        render_country_page(DataManager(config), "Malawi", config)
+
+    at = AppTest.from_function(app, args=(schema_config,)).run()
+    assert not at.exception
+    assert not at.error
+    assert "Page 1 of 1 · 2 record(s)" in [c.value for c in at.caption]
@@ -0,0 +1,71 @@
+"""Tests for dataset storage backends"""
+import pandas as pd
+import pytest
+from crowdsourcing.cli import main as cli_main
+from crowdsourcing.core.data_manager import DataManager, VERSION_COLUMN
+from crowdsourcing.core.storage import CsvStorage, FeatherStorage, ParquetStorage, get_storage
+
+pytest.importorskip("pyarrow")
+
+def test_get_storage_uses_extension(tmp_path):
+    assert isinstance(get_storage(tmp_path / "data.csv"), CsvStorage)
+    assert isinstance(get_storage(tmp_path / "data.parquet"), ParquetStorage)
+    assert isinstance(get_storage(tmp_path / "data.feather"), FeatherStorage)
+    assert isinstance(get_storage(tmp_path / "data.bin", "parquet"), ParquetStorage)
+    with pytest.raises(ValueError):
+        get_storage(tmp_path / "data.txt")
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_columnar_round_trip(tmp_path, sample_config, sample_museums_df, suffix):
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(tmp_path / f"data{suffix}")
+    assert DataManager(config).save_data(sample_museums_df)
+    loaded = DataManager(config).load_data()
+    pd.testing.assert_frame_equal(loaded.drop(columns=VERSION_COLUMN), sample_museums_df)
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_columnar_pushdown_reads_only_region(tmp_path, sample_config, sample_museums_df, suffix):
+    path = tmp_path / f"data{suffix}"
+    df = pd.concat([sample_museums_df, sample_museums_df.assign(country_name='Zambia', id=[3, 4])])
+    get_storage(path).write(df)
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(path)
+    filtered = DataManager(config).get_filtered_data('country_name', 'zambia')
+    assert list(filtered['id']) == [3, 4]
+    assert filtered['heritage'].dtype == bool
+
+def test_migrate_command(tmp_path, sample_museums_df):
+    source = tmp_path / "data.csv"
+    destination = tmp_path / "data.parquet"
+    sample_museums_df.to_csv(source, index=False)
+    assert cli_main(["migrate", str(source), str(destination)]) == 0
+    migrated = pd.read_parquet(destination)
+    pd.testing.assert_frame_equal(migrated.drop(columns=VERSION_COLUMN), sample_museums_df)
+
+@pytest.fixture
+def sqlite_manager(tmp_path, sample_config, sample_museums_df):
+    config = sample_config.copy()
+    config["DATA_PATH"] = str(tmp_path / "data.db")
+    manager = DataManager(config)
+    other = sample_museums_df.assign(country_name='Zambia', id=[3, 4])
+    manager.save_data(pd.concat([sample_museums_df, other], ignore_index=True))
+    return manager
+
+def test_sqlite_uses_wal_and_indexes(sqlite_manager):
+    with sqlite_manager.storage.connect() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(records)")}
+    assert indexes == {"idx_records_id", "idx_records_filter"}
+
+def test_sqlite_row_level_update(sqlite_manager):
+    region = sqlite_manager.get_filtered_data('country_name', 'ZAMBIA')
+    assert list(region['id']) == [3, 4]
+    region.loc[region['id'] == 3, 'description'] = 'Updated'
+    region = pd.concat([region[region['id'] == 3], pd.DataFrame({'name': ['New']})], ignore_index=True)
+
+    assert sqlite_manager.update_records(region, filter_col='country_name', filter_value='Zambia')
+    result = sqlite_manager.load_data().sort_values('id')
+    assert list(result['id']) == [1, 2, 3, 5]
+    assert result.set_index('id').loc[3, 'description'] == 'Updated'
+    assert result.set_index('id').loc[5, 'country_name'] == 'Zambia'
+    assert list(sqlite_manager.get_filtered_data('country_name', 'Malawi')['id']) == [1, 2]
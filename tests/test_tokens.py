@@ -0,0 +1,75 @@
+"""Tests for the token registry"""
+import os
+import pandas as pd
+from crowdsourcing.core.tokens import (
+    TOKEN_LENGTH,
+    TokenRegistry,
+    get_token_registry,
+    provision_tokens,
+    read_token_rows,
+)
+
+def test_registry_resolves_tokens(tmp_path):
+    token_file = tmp_path / "tokens.csv"
+    pd.DataFrame({'token': ['abc', '01234567'], 'country': ['Malawi', 'admin']}).to_csv(token_file, index=False)
+    registry = TokenRegistry(token_file)
+    assert registry.get('abc') == 'Malawi'
+    assert '01234567' in registry  # numeric-looking tokens stay strings
+    assert 'nope' not in registry
+    assert registry.get(None) is None
+    assert len(registry) == 2
+
+def test_registry_does_not_keep_plaintext(tmp_path):
+    token_file = tmp_path / "tokens.csv"
+    pd.DataFrame({'token': ['secret-token'], 'country': ['Malawi']}).to_csv(token_file, index=False)
+    registry = TokenRegistry(token_file)
+    registry.refresh()
+    assert all(b'secret-token' not in key for key in registry._regions)
+
+def test_registry_reloads_when_file_changes(tmp_path):
+    token_file = tmp_path / "tokens.csv"
+    pd.DataFrame({'token': ['abc'], 'country': ['Malawi']}).to_csv(token_file, index=False)
+    registry = TokenRegistry(token_file)
+    assert 'abc' in registry
+    pd.DataFrame({'token': ['xyz'], 'country': ['Zambia']}).to_csv(token_file, index=False)
+    stat = os.stat(token_file)
+    os.utime(token_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert 'abc' not in registry
+    assert registry.get('xyz') == 'Zambia'
+
+def test_get_token_registry_creates_default_file(tmp_path):
+    token_file = tmp_path / "data" / "tokens.csv"
+    registry = get_token_registry(token_file)
+    assert token_file.exists()
+    assert registry.get('admin') == 'admin'
+    assert get_token_registry(token_file) is registry
+
+def test_provision_tokens_covers_missing_regions_once(tmp_path):
+    token_file = tmp_path / "tokens.csv"
+    token_file.write_text("token,country\nadmin,admin\nabc,Malawi\n")
+
+    new_rows = provision_tokens(token_file, ["malawi", "Zambia", "Kenya", "Zambia", None, " "])
+
+    assert [region for _, region in new_rows] == ["Zambia", "Kenya"]
+    registry = TokenRegistry(token_file)
+    assert len(registry) == 4
+    assert all(registry.get(token) == region for token, region in new_rows)
+    assert all(len(token) == TOKEN_LENGTH for token, _ in new_rows)
+    assert provision_tokens(token_file, ["Kenya"]) == []
+
+def test_provision_tokens_cli_exports_new_tokens(tmp_path, monkeypatch, sample_config, sample_museums_df):
+    import json
+    from crowdsourcing.cli import main as cli_main
+    from crowdsourcing.core.data_manager import DataManager
+
+    monkeypatch.chdir(tmp_path)
+    config = {**sample_config, "DATA_PATH": str(tmp_path / "data.csv"), "TOKEN_FILE": str(tmp_path / "tokens.csv")}
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "config.json").write_text(json.dumps(config))
+    DataManager(config).save_data(sample_museums_df)
+
+    assert cli_main(["provision-tokens", "--output", str(tmp_path / "new.xlsx")]) == 0
+    assert (tmp_path / "new.xlsx").read_bytes()[:2] == b"PK"
+    assert TokenRegistry(tmp_path / "tokens.csv").get(
+        next(token for token, region in read_token_rows(tmp_path / "tokens.csv") if region == "Malawi")
+    ) == "Malawi"
@@ -0,0 +1,65 @@
+"""Tests for UI helpers"""
+import pandas as pd
+from crowdsourcing.ui.editor import apply_pending, changes_from_editor_state, count_changes, merge_changes
+
+def test_changes_from_editor_state(sample_museums_df):
+    view = sample_museums_df.assign(_version=[3, 5])
+    state = {
+        "edited_rows": {0: {"name": "Renamed"}, 1: {"description": "Gone"}},
+        "added_rows": [{"name": "New"}, {}],
+        "deleted_rows": [1],
+    }
+    changes = changes_from_editor_state(view, state)
+    assert changes == {
+        "edited": {1: {"name": "Renamed"}},
+        "added": [{"name": "New"}],
+        "deleted": [2],
+        "versions": {1: 3, 2: 5},
+    }
+    assert count_changes(changes) == 3
+    assert count_changes(changes_from_editor_state(view, None)) == 0
+
+def test_merge_changes_keeps_first_read_version(sample_museums_df):
+    first = {"edited": {1: {"name": "A"}}, "added": [], "deleted": [], "versions": {1: 0}}
+    second = {"edited": {1: {"description": "B"}, 2: {"name": "C"}}, "added": [{"name": "D"}],
+              "deleted": [2], "versions": {1: 4, 2: 1}}
+    merged = merge_changes(first, second)
+    assert merged == {
+        "edited": {1: {"name": "A", "description": "B"}},
+        "added": [{"name": "D"}],
+        "deleted": [2],
+        "versions": {1: 0, 2: 1},
+    }
+    view = apply_pending(sample_museums_df, merged)
+    assert list(view['id']) == [1]
+    assert view['name'].iloc[0] == 'A'
+
+def test_country_page_saves_edits_from_several_pages(tmp_path, sample_config):
+    from streamlit.testing.v1 import AppTest
+    from crowdsourcing.core.data_manager import DataManager
+
+    config = {**sample_config, "DATA_PATH": str(tmp_path / "data.csv")}
+    DataManager(config).save_data(pd.DataFrame({
+        'country_name': ['Malawi'] * 60,
+        'name': [f'Museum {i}' for i in range(60)],
+        'id': range(1, 61),
+    }))
+
+    def app(config):
+        import streamlit as st
+        from crowdsourcing.core.data_manager import DataManager
+        from crowdsourcing.main import render_country_page
+        st.session_state.setdefault("token", "test")
+        render_country_page(DataManager(config), "Malawi", config)
+
+    at = AppTest.from_function(app, args=(config,)).run()
+    # The browser resends the editor delta on every rerun; AppTest needs it set explicitly.
+    at.session_state["editor_Malawi_0_0"] = {"edited_rows": {0: {"name": "First"}}, "added_rows": [], "deleted_rows": []}
+    next(b for b in at.button if b.label == "Next ▶").click().run()
+    assert "Page 2 of 2 · 60 record(s)" in [c.value for c in at.caption]
+    at.session_state["editor_Malawi_0_1"] = {"edited_rows": {0: {"name": "Last"}}, "added_rows": [], "deleted_rows": []}
+    next(b for b in at.button if b.label == "Save Changes").click().run()
+
+    assert not at.exception
+    df = DataManager(config).load_data()
+    assert df.loc[df['id'].isin([1, 51]), 'name'].tolist() == ['First', 'Last']